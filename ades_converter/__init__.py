@@ -0,0 +1,27 @@
+from . import ades  # registra i formati di output PSV e XML
+from .alcdef import convert_alcdef_archive, index_alcdef_blocks
+from .core import (
+    INPUT_FORMATS,
+    OUTPUT_FORMATS,
+    InputFormat,
+    ObsColumns,
+    build_suggested_filename,
+    convert_columns,
+    convert_file,
+    convert_rows,
+    detect_input_format,
+    format_columns,
+    jd_array_to_isot_z,
+    jd_to_isot_z,
+    read_any_columns,
+    read_alcdef_columns,
+    read_any_input,
+    read_canopus_alcdef,
+    read_canopus_observations_table,
+    read_csv_jd_mag_err,
+    read_tycho_fotometry_whitespace,
+    register_input_format,
+    register_output_format,
+    to_n_decimals,
+)
+from .profiling import StageProfiler
@@ -0,0 +1,137 @@
+import re
+from typing import Any, Dict, List, Sequence, TextIO, Tuple
+from xml.sax.saxutils import XMLGenerator, escape
+
+from .core import DEFAULT_DATE_DEC, register_output_format
+
+ADES_VERSION = "2017"
+ADES_MODE = "CCD"
+FILTER_BANDS = {"CLEAR": "C", "CL": "C", "NONE": "C", "UNFILTERED": "C"}
+PROVISIONAL_ID = re.compile(r"^\d{4} [A-Z]{2}\d*$")
+XML_INDENT = "  "
+
+
+def object_id_field(obj: str) -> Tuple[str, str]:
+    obj = " ".join((obj or "").split())
+    if not obj:
+        return "", ""
+    if obj.isdigit():
+        return "permID", obj.lstrip("0") or "0"
+    if PROVISIONAL_ID.match(obj.upper()):
+        return "provID", obj.upper()
+    return "trkSub", obj.replace(" ", "").replace("|", "")
+
+
+def filter_band(filt: str) -> str:
+    # i codici di banda ADES distinguono maiuscole e minuscole (Rc, Sg, ...): si normalizzano solo gli alias di "clear"
+    filt = (filt or "").strip()
+    return FILTER_BANDS.get(filt.upper(), filt)
+
+
+def obs_time_width(date_dec: int) -> int:
+    return 20 + (date_dec + 1 if date_dec else 0)
+
+
+def ades_fields(context: Dict[str, Any]) -> List[Tuple[str, str]]:
+    id_name, id_value = object_id_field(context.get("obj", ""))
+    fields = []
+    if id_name:
+        fields.append((id_name, id_value))
+    fields.append(("mode", ADES_MODE))
+    mpc = (context.get("mpc") or "").strip().upper()
+    if mpc:
+        fields.append(("stn", mpc))
+    return fields
+
+
+class PsvWriter:
+    def __init__(self, out: TextIO, context: Dict[str, Any], widths: Tuple[int, int]):
+        self.out = out
+        fixed = ades_fields(context)
+        band = filter_band(context.get("filt", ""))
+        time_w = obs_time_width(context.get("date_dec", DEFAULT_DATE_DEC))
+        mag_w = max(widths[0], len("mag"))
+        err_w = max(widths[1], len("rmsMag"))
+        names = [name for name, _ in fixed] + ["obsTime", "mag", "rmsMag"] + (["band"] if band else [])
+        col_w = [max(len(name), len(value)) for name, value in fixed] + [time_w, mag_w, err_w]
+        prefix = "|".join(f"{value:<{w}}" for (_, value), w in zip(fixed, col_w))
+        self.prefix = prefix + "|" if prefix else ""
+        self.suffix = f"|{band}" if band else ""
+        self.time_w, self.mag_w, self.err_w = time_w, mag_w, err_w
+        out.write(f"# version={ADES_VERSION}\n")
+        if context.get("mpc"):
+            out.write("# observatory\n")
+            out.write(f"! mpcCode {context['mpc'].strip().upper()}\n")
+        out.write("|".join(f"{name:<{w}}" for name, w in zip(names, col_w + [len("band")])).rstrip() + "\n")
+
+    def write_rows(self, obs_times: Sequence[str], mags_fmt: Sequence[str], errs_fmt: Sequence[str]):
+        prefix, suffix = self.prefix, self.suffix
+        time_w, mag_w, err_w = self.time_w, self.mag_w, self.err_w
+        self.out.writelines(
+            f"{prefix}{t:<{time_w}}|{m:>{mag_w}}|{e:>{err_w}}{suffix}\n" for t, m, e in zip(obs_times, mags_fmt, errs_fmt)
+        )
+
+    def close(self):
+        pass
+
+
+class XmlWriter:
+    def __init__(self, out: TextIO, context: Dict[str, Any], widths: Tuple[int, int]):
+        self.out = out
+        self.gen = XMLGenerator(out, encoding="utf-8")
+        gen = self.gen
+        gen.startDocument()
+        gen.startElement("ades", {"version": ADES_VERSION})
+        self._nl(1)
+        gen.startElement("obsBlock", {})
+        mpc = (context.get("mpc") or "").strip().upper()
+        if mpc:
+            self._nl(2)
+            gen.startElement("obsContext", {})
+            self._nl(3)
+            gen.startElement("observatory", {})
+            self._nl(4)
+            self._element("mpcCode", mpc)
+            self._nl(3)
+            gen.endElement("observatory")
+            self._nl(2)
+            gen.endElement("obsContext")
+        self._nl(2)
+        gen.startElement("obsData", {})
+        pad = "\n" + XML_INDENT * 4
+        fixed = "".join(f"{pad}<{name}>{escape(value)}</{name}>" for name, value in ades_fields(context))
+        band = filter_band(context.get("filt", ""))
+        band_xml = f"{pad}<band>{escape(band)}</band>" if band else ""
+        # obsTime, mag e rmsMag contengono solo cifre, segni, punti, "T", ":" e "Z": nessun escape necessario
+        self.row_start = "\n" + XML_INDENT * 3 + "<optical>" + fixed + pad + "<obsTime>"
+        self.row_mag = "</obsTime>" + pad + "<mag>"
+        self.row_err = "</mag>" + pad + "<rmsMag>"
+        self.row_end = "</rmsMag>" + band_xml + "\n" + XML_INDENT * 3 + "</optical>"
+
+    def _nl(self, depth: int):
+        self.gen.ignorableWhitespace("\n" + XML_INDENT * depth)
+
+    def _element(self, name: str, value: str):
+        self.gen.startElement(name, {})
+        self.gen.characters(value)
+        self.gen.endElement(name)
+
+    def write_rows(self, obs_times: Sequence[str], mags_fmt: Sequence[str], errs_fmt: Sequence[str]):
+        start, mid_mag, mid_err, end = self.row_start, self.row_mag, self.row_err, self.row_end
+        self.out.writelines(
+            start + t + mid_mag + m + mid_err + e + end for t, m, e in zip(obs_times, mags_fmt, errs_fmt)
+        )
+
+    def close(self):
+        self._nl(2)
+        self.gen.endElement("obsData")
+        self._nl(1)
+        self.gen.endElement("obsBlock")
+        self._nl(0)
+        self.gen.endElement("ades")
+        self.gen.ignorableWhitespace("\n")
+        self.gen.endDocument()
+
+
+register_output_format("psv", ".psv", PsvWriter)
+register_output_format("xml", ".xml", XmlWriter, needs_widths=False)
@@ -0,0 +1,200 @@
+import mmap
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from .core import (
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    OUTPUT_FORMATS,
+    ConversionCancelled,
+    apply_umask_mode,
+    build_suggested_filename,
+    concat_columns,
+    convert_columns,
+    iter_alcdef_column_chunks,
+    new_result,
+    output_context,
+    place_outputs,
+    write_output,
+)
+
+START_METADATA = re.compile(rb"^[ \t]*STARTMETADATA[ \t]*\r?$", re.MULTILINE)
+END_METADATA = re.compile(rb"^[ \t]*ENDMETADATA[ \t]*\r?$", re.MULTILINE)
+SPLIT_PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+
+class AlcdefBlock(NamedTuple):
+    index: int
+    start: int
+    stop: int
+    metadata: Dict[str, str]
+
+
+def parse_metadata(text: str) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.strip().partition("=")
+        if sep and key:
+            meta.setdefault(key.strip().upper(), value.strip())
+    return meta
+
+
+def index_alcdef_blocks(path: str) -> List[AlcdefBlock]:
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            starts = [m.start() for m in START_METADATA.finditer(mm)]
+            if not starts:
+                return [AlcdefBlock(1, 0, size, {})]
+            blocks = []
+            bounds = starts + [size]
+            for i, (start, stop) in enumerate(zip(bounds, bounds[1:]), start=1):
+                end_meta = END_METADATA.search(mm, start, stop)
+                if end_meta is None:
+                    meta_stop = data_start = stop
+                else:
+                    meta_stop = end_meta.start()
+                    data_start = end_meta.end()
+                meta = parse_metadata(mm[start:meta_stop].decode("utf-8", errors="replace"))
+                blocks.append(AlcdefBlock(i, data_start, stop, meta))
+            return blocks
+
+
+def block_number(block: AlcdefBlock) -> str:
+    number = block.metadata.get("OBJECTNUMBER", "").strip()
+    return number if number.isdigit() and number.strip("0") else ""
+
+
+def block_fields(block: AlcdefBlock, mpc: str = "", obj: str = "", filt: str = "") -> Dict[str, str]:
+    meta = block.metadata
+    return {
+        "mpc": meta.get("MPCCODE") or mpc,
+        "obj": meta.get("OBJECTNAME") or block_number(block) or obj,
+        "filt": meta.get("FILTER") or filt,
+    }
+
+
+def convert_alcdef_block(
+    path: str,
+    block: AlcdefBlock,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    out_dir: Optional[str] = None,
+    output_format: str = "txt",
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result = new_result(path)
+    result["format"] = "ALCDEF"
+    result["block"] = block.index
+    result.update(block_fields(block, mpc, obj, filt))
+    tmp_path = None
+    try:
+        cols = concat_columns(list(iter_alcdef_column_chunks(path, start=block.start, stop=block.stop)))
+        result["rows"] = cols.n_rows
+        if not cols.n_rows:
+            result["error"] = "Nessuna riga valida trovata (JD, Mag, MagErr)."
+            return result
+        obs_times, lines = convert_columns(cols, date_dec, mag_dec, err_dec, on_warn=result["warnings"].append)
+        if not obs_times:
+            result["error"] = "Tutte le conversioni JD sono fallite."
+            return result
+        n_obs = len(lines) - 1
+        out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".ades_", suffix=".tmp", dir=out_dir)
+        os.close(fd)
+        # negli output ADES un asteroide numerato è identificato dal permID, non dal nome
+        context = output_context(result["mpc"], block_number(block) or result["obj"], result["filt"], date_dec)
+        write_output(tmp_path, lines, output_format, context)
+        apply_umask_mode(tmp_path)
+        out_name = build_suggested_filename(obs_times, n_obs, result["mpc"], result["obj"], result["filt"])
+        result["out_name"] = out_name + OUTPUT_FORMATS[output_format].extension
+        result["n_obs"] = n_obs
+        result["tmp_path"], tmp_path = tmp_path, None
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+def _discard_outputs(results: Iterable[Dict[str, Any]]):
+    for r in results:
+        if r.get("tmp_path"):
+            try:
+                os.remove(r["tmp_path"])
+            except OSError:
+                pass
+
+
+def convert_alcdef_archive(
+    path: str,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    out_dir: Optional[str] = None,
+    output_format: str = "txt",
+    jobs: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    used_paths: Optional[set] = None,
+) -> List[Dict[str, Any]]:
+    out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+    blocks = index_alcdef_blocks(path)
+    kwargs = dict(
+        mpc=mpc,
+        obj=obj,
+        filt=filt,
+        date_dec=date_dec,
+        mag_dec=mag_dec,
+        err_dec=err_dec,
+        out_dir=out_dir,
+        output_format=output_format,
+    )
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(blocks)))
+    if os.path.getsize(path) < SPLIT_PARALLEL_MIN_BYTES:
+        jobs = 1
+    results: List[Dict[str, Any]] = []
+    if jobs == 1:
+        for block in blocks:
+            if should_stop is not None and should_stop():
+                _discard_outputs(results)
+                raise ConversionCancelled()
+            results.append(convert_alcdef_block(path, block, **kwargs))
+            if on_progress is not None:
+                on_progress(len(results), len(blocks))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = [ex.submit(convert_alcdef_block, path, block, **kwargs) for block in blocks]
+            for fut in futures:
+                while should_stop is not None and not fut.done():
+                    if should_stop():
+                        for f in futures:
+                            f.cancel()
+                        wait(futures)
+                        _discard_outputs(f.result() for f in futures if not f.cancelled() and f.exception() is None)
+                        raise ConversionCancelled()
+                    wait([fut], timeout=0.2)
+                results.append(fut.result())
+                if on_progress is not None:
+                    on_progress(len(results), len(blocks))
+    place_outputs(results, used_paths)
+    return results
@@ -0,0 +1,232 @@
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .core import (
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    convert_columns,
+    detect_input_format,
+    jd_array_to_isot_z,
+    read_any_columns,
+    write_lines,
+)
+from .profiling import StageProfiler
+
+BENCH_FORMATS = ("alcdef", "canopus", "tycho", "csv-comma", "csv-semicolon", "csv-tab", "csv-space")
+BENCH_SIZES = (1000, 10000, 100000)
+BENCH_STAGES = ("detect", "read", "jd", "round", "format", "write")
+BENCH_JD0 = 2460938.3
+BENCH_CADENCE = 20.0 / 86400.0
+GEN_CHUNK_ROWS = 100000
+REGRESSION_THRESHOLD = 0.8
+
+CSV_DELIMITERS = {"csv-comma": ",", "csv-semicolon": ";", "csv-tab": "\t", "csv-space": " "}
+
+
+def _header(fmt: str) -> str:
+    if fmt == "alcdef":
+        return (
+            "STARTMETADATA\nREVISEDDATA=FALSE\nOBJECTNUMBER=0\nOBJECTNAME=2025 FA22\n"
+            "MPCCODE=L90\nFILTER=C\nMAGBAND=V\nDELIMITER=PIPE\nENDMETADATA\n"
+        )
+    if fmt == "canopus":
+        return "Observation data\n\nUse  JD              Hel. Dist  Phase  Obs.   O-CAvg   Err\n" + "-" * 60 + "\n"
+    if fmt == "tycho":
+        return "JD MAG ERR\n"
+    delimiter = CSV_DELIMITERS[fmt]
+    if delimiter == " ":
+        return "# synthetic benchmark data\n"
+    return delimiter.join(("JD", "Mag", "MagErr")) + "\n"
+
+
+def _rows(fmt: str, jd: np.ndarray, mag: np.ndarray, err: np.ndarray) -> str:
+    if fmt == "alcdef":
+        return "".join(f"DATA={j:.6f}|{m:+.3f}|{e:.3f}\n" for j, m, e in zip(jd.tolist(), mag.tolist(), err.tolist()))
+    if fmt == "canopus":
+        return "".join(
+            f"Y  {j:.6f}  1.234  12.3  {m:.3f}  {m - 0.01:+.3f}  {e:.3f}\n"
+            for j, m, e in zip(jd.tolist(), mag.tolist(), err.tolist())
+        )
+    if fmt == "tycho":
+        return "".join(f"{j:.6f} {m:.4f} {e:.4f}\n" for j, m, e in zip(jd.tolist(), mag.tolist(), err.tolist()))
+    d = CSV_DELIMITERS[fmt]
+    if d == ";":
+        return "".join(
+            f"{j:.6f};{m:.4f};{e:.4f}\n".replace(".", ",") for j, m, e in zip(jd.tolist(), mag.tolist(), err.tolist())
+        )
+    return "".join(f"{j:.6f}{d}{m:.4f}{d}{e:.4f}\n" for j, m, e in zip(jd.tolist(), mag.tolist(), err.tolist()))
+
+
+def generate_dataset(fmt: str, n_rows: int, path: str, seed: int = 0) -> str:
+    if fmt not in BENCH_FORMATS:
+        raise ValueError(f"Formato sconosciuto: {fmt}")
+    rng = np.random.default_rng(seed)
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(_header(fmt))
+        for start in range(0, n_rows, GEN_CHUNK_ROWS):
+            n = min(GEN_CHUNK_ROWS, n_rows - start)
+            jd = BENCH_JD0 + (np.arange(start, start + n) * BENCH_CADENCE)
+            mag = 15.0 + 0.3 * np.sin(jd * 40.0) + rng.normal(0.0, 0.02, n)
+            err = np.abs(rng.normal(0.03, 0.01, n))
+            f.write(_rows(fmt, jd, mag, err))
+    return path
+
+
+def dataset_path(data_dir: str, fmt: str, n_rows: int) -> str:
+    ext = "csv" if fmt.startswith("csv") else "txt"
+    return os.path.join(data_dir, f"bench_{fmt}_{n_rows}.{ext}")
+
+
+def ensure_dataset(data_dir: str, fmt: str, n_rows: int) -> str:
+    path = dataset_path(data_dir, fmt, n_rows)
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        generate_dataset(fmt, n_rows, path)
+    return path
+
+
+def benchmark_file(
+    path: str,
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    memory: bool = False,
+    parse_jobs: int = 1,
+) -> Dict[str, Any]:
+    prof = StageProfiler(memory=memory)
+    prof.start()
+    try:
+        with prof.stage("detect"):
+            fmt, _ = detect_input_format(path)
+        with prof.stage("read") as st:
+            cols = read_any_columns(path, fmt=fmt, jobs=parse_jobs)
+            st.rows = cols.n_rows
+        _, lines = convert_columns(cols, date_dec, mag_dec, err_dec, profiler=prof)
+        fd, out_path = tempfile.mkstemp(suffix=".txt")
+        os.close(fd)
+        try:
+            with prof.stage("write", len(lines) - 1):
+                write_lines(out_path, lines)
+        finally:
+            os.remove(out_path)
+    finally:
+        prof.stop()
+    total = sum(s["seconds"] for s in prof.stages.values())
+    return {
+        "path": path,
+        "format": fmt.name,
+        "rows": cols.n_rows,
+        "stages": prof.as_dict(),
+        "total_seconds": total,
+        "rows_per_sec": cols.n_rows / total if total > 0 else 0.0,
+    }
+
+
+def load_history(path: str) -> List[Dict[str, Any]]:
+    runs: List[Dict[str, Any]] = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        runs.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except OSError:
+        pass
+    return runs
+
+
+def append_history(path: str, run: Dict[str, Any]):
+    with open(path, "a", encoding="utf-8", newline="\n") as f:
+        f.write(json.dumps(run, sort_keys=True) + "\n")
+
+
+def previous_result(
+    history: List[Dict[str, Any]], dataset: str, rows: int, memory: bool = False, parse_jobs: int = 1
+) -> Optional[Dict[str, Any]]:
+    for run in reversed(history):
+        if run.get("memory", False) != memory or run.get("parse_jobs", 1) != parse_jobs:
+            continue
+        for r in run.get("results", []):
+            if r.get("dataset") == dataset and r.get("rows") == rows:
+                return r
+    return None
+
+
+def run_benchmarks(
+    formats: Sequence[str] = BENCH_FORMATS,
+    sizes: Sequence[int] = BENCH_SIZES,
+    data_dir: Optional[str] = None,
+    repeat: int = 1,
+    memory: bool = False,
+    history_path: Optional[str] = None,
+    parse_jobs: int = 1,
+    **decimals,
+) -> Dict[str, Any]:
+    data_dir = data_dir or os.path.join(tempfile.gettempdir(), "ades_converter_bench")
+    history = load_history(history_path) if history_path else []
+    # astropy import e prima conversione non vanno attribuiti alla fase "jd" del primo file
+    jd_array_to_isot_z(np.array([BENCH_JD0]), 3)
+    results = []
+    for n_rows in sizes:
+        for fmt in formats:
+            path = ensure_dataset(data_dir, fmt, n_rows)
+            best = None
+            for _ in range(max(1, repeat)):
+                r = benchmark_file(path, memory=memory, parse_jobs=parse_jobs, **decimals)
+                if best is None or r["total_seconds"] < best["total_seconds"]:
+                    best = r
+            best["dataset"] = fmt
+            prev = previous_result(history, fmt, n_rows, memory, parse_jobs)
+            if prev is not None and prev.get("rows_per_sec"):
+                best["ratio"] = best["rows_per_sec"] / prev["rows_per_sec"]
+                best["regressions"] = [
+                    name
+                    for name, stage in best["stages"].items()
+                    if prev.get("stages", {}).get(name, {}).get("rows_per_sec")
+                    and stage["rows_per_sec"] < REGRESSION_THRESHOLD * prev["stages"][name]["rows_per_sec"]
+                ]
+            results.append(best)
+    run = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "memory": memory,
+        "parse_jobs": parse_jobs,
+        "results": results,
+    }
+    if history_path:
+        append_history(history_path, run)
+    return run
+
+
+def print_report(run: Dict[str, Any], out=None):
+    headers = ("Dataset", "Righe") + BENCH_STAGES + ("Totale (s)", "Righe/s", "Picco MB", "vs prec.")
+    table = []
+    for r in run["results"]:
+        stages = r["stages"]
+        peak = max((s.get("peak_mb", 0.0) for s in stages.values()), default=0.0)
+        ratio = r.get("ratio")
+        trend = "-" if ratio is None else f"{ratio:.2f}x"
+        if r.get("regressions"):
+            trend += " REGRESSIONE: " + ",".join(r["regressions"])
+        table.append(
+            (r["dataset"], str(r["rows"]))
+            + tuple(f"{stages[s]['seconds']:.4f}" for s in BENCH_STAGES)
+            + (f"{r['total_seconds']:.4f}", f"{r['rows_per_sec']:.0f}", f"{peak:.1f}" if peak else "-", trend)
+        )
+    widths = [max(len(h), *(len(row[i]) for row in table)) if table else len(h) for i, h in enumerate(headers)]
+    fmt = "  ".join(f"{{:<{w}}}" if i in (0, len(headers) - 1) else f"{{:>{w}}}" for i, w in enumerate(widths))
+    print(fmt.format(*headers).rstrip(), file=out)
+    print("  ".join("-" * w for w in widths), file=out)
+    for row in table:
+        print(fmt.format(*row).rstrip(), file=out)
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".lines"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    base = (
+        os.environ.get("LOCALAPPDATA")
+        or os.environ.get("XDG_CACHE_HOME")
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(base, "ADES Converter", "cache")
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(HASH_BLOCK_SIZE)
+            if not block:
+                break
+            h.update(block)
+    return h.hexdigest()
+
+
+def first_obs_time(lines: List[str]) -> List[str]:
+    if len(lines) < 2:
+        return []
+    return [lines[1].split(" ", 1)[0]]
+
+
+class ConversionCache:
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, path: str, date_dec: int, mag_dec: int, err_dec: int, fmt: str = "") -> str:
+        digest = file_digest(path)
+        raw = f"v{CACHE_VERSION}|{digest}|{fmt}|{date_dec}|{mag_dec}|{err_dec}"
+        return hashlib.sha256(raw.encode("ascii")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[int, List[str]]]:
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "r", encoding="utf-8", newline="\n") as f:
+                n_rows = int(f.readline())
+                lines = f.read().splitlines()
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return n_rows, lines
+
+    def put(self, key: str, n_rows: int, lines: List[str]):
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=CACHE_SUFFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                f.write(f"{n_rows}\n")
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.evict()
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(CACHE_SUFFIX) or name.startswith(".tmp_"):
+                continue
+            full = os.path.join(self.directory, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, full))
+        return entries
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, full in sorted(entries):
+            try:
+                os.remove(full)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self) -> Tuple[int, int]:
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def clear(self) -> int:
+        removed = 0
+        for _, _, full in self._entries():
+            try:
+                os.remove(full)
+                removed += 1
+            except OSError:
+                pass
+        return removed
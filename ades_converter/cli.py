@@ -0,0 +1,414 @@
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .alcdef import convert_alcdef_archive
+from .bench import BENCH_FORMATS, BENCH_SIZES, print_report, run_benchmarks
+from .cache import ConversionCache
+from .core import (
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    OUTPUT_FORMATS,
+    STREAM_CHUNK_ROWS,
+    convert_file,
+    convert_file_streaming,
+    detect_input_format,
+    place_outputs,
+)
+from .incremental import convert_file_incremental
+from .profiling import StageProfiler, format_stage_report
+from .server import SERVER_HOST, SERVER_MAX_BYTES, SERVER_PORT, SERVER_QUEUE_SIZE, SERVER_TIMEOUT, ConversionServer
+from .utc import cross_check_jd
+from .watch import WATCH_INTERVAL, WATCH_PATTERNS, FolderWatcher
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    paths: List[str] = []
+    seen = set()
+    for pat in patterns:
+        matches = sorted(glob.glob(pat)) if glob.has_magic(pat) else [pat]
+        for p in matches:
+            if os.path.isfile(p) and p not in seen:
+                seen.add(p)
+                paths.append(p)
+    return paths
+
+
+def print_summary(results: List[Dict[str, Any]], elapsed: float, out=sys.stdout):
+    headers = ("File", "Formato", "Righe", "Oss.", "Tempo (s)", "Esito")
+    table = []
+    for r in results:
+        status = os.path.basename(r["out_path"]) if r["out_path"] else f"ERRORE: {r['error']}"
+        if r.get("cached"):
+            status += " (cache)"
+        name = os.path.basename(r["path"])
+        if r.get("block"):
+            name += f" #{r['block']}"
+        table.append(
+            (name, r["format"] or "-", str(r["rows"]), str(r["n_obs"]), f"{r['seconds']:.3f}", status)
+        )
+    widths = [max(len(h), *(len(row[i]) for row in table)) if table else len(h) for i, h in enumerate(headers)]
+    fmt = "  ".join(f"{{:<{w}}}" if i in (0, 1, 5) else f"{{:>{w}}}" for i, w in enumerate(widths))
+    print(fmt.format(*headers).rstrip(), file=out)
+    print("  ".join("-" * w for w in widths), file=out)
+    for row in table:
+        print(fmt.format(*row).rstrip(), file=out)
+    n_ok = sum(1 for r in results if r["out_path"])
+    n_obs = sum(r["n_obs"] for r in results)
+    print(f"\nFile convertiti: {n_ok}/{len(results)}  Osservazioni: {n_obs}  Tempo totale: {elapsed:.3f} s", file=out)
+
+
+def is_alcdef(path: str) -> bool:
+    try:
+        return detect_input_format(path)[0].name == "ALCDEF"
+    except OSError:
+        return False
+
+
+def stage_profiler(args: argparse.Namespace, index: int, n_files: int) -> StageProfiler:
+    cprofile_path = args.cprofile
+    if cprofile_path and n_files > 1:
+        root, ext = os.path.splitext(cprofile_path)
+        cprofile_path = f"{root}.{index + 1}{ext or '.prof'}"
+    return StageProfiler(memory=args.profile_memory, cprofile_path=cprofile_path)
+
+
+def print_profile(results: List[Dict[str, Any]], json_path: Optional[str] = None, out=sys.stdout):
+    report = [
+        {k: r.get(k) for k in ("path", "format", "rows", "n_obs", "seconds", "stages")}
+        for r in results
+    ]
+    if json_path == "-":
+        json.dump(report, out, indent=1)
+        print(file=out)
+        return
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+    for r in results:
+        if r.get("stages"):
+            print(f"\n{os.path.basename(r['path'])}", file=out)
+            for line in format_stage_report(r["stages"]):
+                print(line, file=out)
+
+
+def conversion_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
+    return dict(
+        mpc=args.mpc,
+        obj=args.object,
+        filt=args.filter,
+        date_dec=args.date_dec,
+        mag_dec=args.mag_dec,
+        err_dec=args.err_dec,
+    )
+
+
+def run_convert(args: argparse.Namespace) -> int:
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Nessun file di input trovato.", file=sys.stderr)
+        return 2
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    kwargs = conversion_kwargs(args)
+    kwargs["out_dir"] = args.out_dir
+    func = convert_file
+    if args.incremental:
+        if args.output_format != "txt":
+            print("--incremental produce solo il formato txt.", file=sys.stderr)
+            return 2
+        func = convert_file_incremental
+    elif args.stream or args.output_format != "txt":
+        func = convert_file_streaming
+        kwargs.update(
+            chunk_size=args.chunk_size,
+            widths=tuple(args.widths) if args.widths else None,
+            output_format=args.output_format,
+        )
+    elif not args.no_cache:
+        kwargs["cache"] = ConversionCache(args.cache_dir)
+    if func is not convert_file_incremental:
+        # i processi scrivono su file temporanei; i nomi definitivi si decidono qui, senza sovrascritture
+        kwargs["defer_placement"] = True
+    profile = args.profile or args.profile_memory or args.profile_json or args.cprofile
+    if profile and args.incremental:
+        print("[WARN] La profilazione per fase non è disponibile con --incremental.", file=sys.stderr)
+        profile = False
+    t0 = time.perf_counter()
+    archives = [p for p in paths if is_alcdef(p)] if args.split_alcdef else []
+    files = [p for p in paths if p not in archives]
+    job_kwargs = [dict(kwargs, profiler=stage_profiler(args, i, len(files))) if profile else kwargs for i in range(len(files))]
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(files) or 1))
+    if len(files) == 1 and func is convert_file:
+        # un solo file: i processi servono a leggere in parallelo i CSV/Tycho grandi
+        job_kwargs[0] = dict(job_kwargs[0], parse_jobs=args.jobs or os.cpu_count() or 1)
+    if jobs == 1:
+        file_results = [func(p, **kw) for p, kw in zip(files, job_kwargs)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = [ex.submit(func, p, **kw) for p, kw in zip(files, job_kwargs)]
+            file_results = [f.result() for f in futures]
+    used_paths: set = set()
+    place_outputs(file_results, used_paths)
+    by_path = {p: [r] for p, r in zip(files, file_results)}
+    for p in archives:
+        by_path[p] = convert_alcdef_archive(
+            p,
+            out_dir=args.out_dir,
+            output_format=args.output_format,
+            jobs=args.jobs,
+            used_paths=used_paths,
+            **conversion_kwargs(args),
+        )
+    results = [r for p in paths for r in by_path[p]]
+    elapsed = time.perf_counter() - t0
+    if args.verbose:
+        for r in results:
+            for w in r["warnings"]:
+                print(f"{os.path.basename(r['path'])}: {w}", file=sys.stderr)
+    out_paths = [r["out_path"] for r in results if r["out_path"]]
+    for dup in sorted({p for p in out_paths if out_paths.count(p) > 1}):
+        print(f"[WARN] Più file sorgente hanno prodotto lo stesso output: {dup}", file=sys.stderr)
+    print_summary(results, elapsed, out=sys.stderr if args.profile_json == "-" else sys.stdout)
+    if profile:
+        print_profile(results, args.profile_json)
+    return 0 if all(r["out_path"] for r in results) else 1
+
+
+def run_watch(args: argparse.Namespace) -> int:
+    def report(r: Dict[str, Any]):
+        stamp = time.strftime("%H:%M:%S")
+        name = os.path.basename(r["path"])
+        if r["out_path"]:
+            print(f"{stamp} {name} -> {os.path.basename(r['out_path'])} ({r['n_obs']} oss., {r['seconds']:.3f} s)", flush=True)
+        else:
+            print(f"{stamp} {name}: ERRORE: {r['error']}", flush=True)
+
+    watcher = FolderWatcher(
+        args.directory,
+        out_dir=args.out_dir,
+        patterns=args.pattern or WATCH_PATTERNS,
+        state_path=args.state,
+        convert=convert_file_incremental if args.incremental else convert_file,
+        on_result=report,
+        **conversion_kwargs(args),
+    )
+    if args.once:
+        watcher.ready_files()
+        time.sleep(args.interval)
+        watcher.poll_once()
+        return 0
+    print(f"In ascolto su {watcher.directory} -> {watcher.out_dir} (Ctrl+C per terminare)", flush=True)
+    try:
+        watcher.run(interval=args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def run_serve(args: argparse.Namespace) -> int:
+    try:
+        server = ConversionServer(
+            host=args.host,
+            port=args.port,
+            jobs=args.jobs,
+            queue_size=args.queue_size,
+            request_timeout=args.timeout,
+            max_bytes=int(args.max_mb * 1024 * 1024),
+            log_requests=args.log_requests,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Impossibile avviare il server: {e}", file=sys.stderr)
+        return 2
+    with server:
+        t0 = time.perf_counter()
+        n_workers = server.warm_up()
+        print(
+            f"Server ADES su {server.url} ({n_workers} processi pronti in {time.perf_counter() - t0:.2f} s, "
+            f"coda {server.queue_size}; Ctrl+C per terminare)",
+            flush=True,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+def run_jd_check(args: argparse.Namespace) -> int:
+    t0 = time.perf_counter()
+    checked, mismatches = cross_check_jd(samples=args.samples, seed=args.seed)
+    for jd, precision, ref, fast in mismatches[:20]:
+        print(f"JD {jd!r} ({precision} decimali): astropy {ref}  veloce {fast}")
+    print(f"JD confrontati: {checked}  Differenze: {len(mismatches)}  Tempo: {time.perf_counter() - t0:.1f} s")
+    return 1 if mismatches else 0
+
+
+def run_bench(args: argparse.Namespace) -> int:
+    run = run_benchmarks(
+        formats=args.formats,
+        sizes=args.sizes,
+        data_dir=args.data_dir,
+        repeat=args.repeat,
+        memory=args.memory,
+        history_path=args.history,
+        parse_jobs=args.parse_jobs,
+        date_dec=args.date_dec,
+        mag_dec=args.mag_dec,
+        err_dec=args.err_dec,
+    )
+    print_report(run)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=1)
+    regressions = [r for r in run["results"] if r.get("regressions")]
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+def run_cache_clear(args: argparse.Namespace) -> int:
+    cache = ConversionCache(args.cache_dir)
+    removed = cache.clear()
+    print(f"Cache svuotata: {removed} voci rimosse da {cache.directory}")
+    return 0
+
+
+HEAVY_MODULES = ("astropy", "PyQt5")
+
+
+def measure_import_time(module: str) -> Tuple[float, Dict[str, float]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        try:
+            cum_us = int(parts[1].strip())
+        except (IndexError, ValueError):
+            continue
+        name = parts[2].strip()
+        cumulative[name] = cum_us / 1000.0
+    return cumulative.get(module, 0.0), cumulative
+
+
+def run_importtime(args: argparse.Namespace) -> int:
+    failed = False
+    for module in args.modules:
+        total_ms, cumulative = measure_import_time(module)
+        heavy = [m for m in HEAVY_MODULES if m in cumulative]
+        print(f"{module}: {total_ms:.1f} ms")
+        top = sorted((kv for kv in cumulative.items() if kv[0] != module), key=lambda kv: kv[1], reverse=True)[:5]
+        for name, ms in top:
+            print(f"    {name:<40} {ms:8.1f} ms")
+        if heavy:
+            print(f"[ERROR] {module} importa moduli pesanti: {', '.join(heavy)}")
+            failed = True
+        if args.budget_ms is not None and total_ms > args.budget_ms:
+            print(f"[ERROR] {module} supera il limite di {args.budget_ms:.0f} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+def add_conversion_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--mpc", default="", help="Codice MPC (es. L90).")
+    parser.add_argument("--object", default="", help="Oggetto osservato (es. 2025 FA22).")
+    parser.add_argument("--filter", default="", help="Filtro utilizzato (es. CLEAR).")
+    parser.add_argument("--date-dec", type=int, default=DEFAULT_DATE_DEC, choices=range(0, 10), metavar="N", help="Decimali dei secondi (0-9).")
+    parser.add_argument("--mag-dec", type=int, default=DEFAULT_MAG_DEC, choices=range(0, 7), metavar="N", help="Decimali della magnitudine (0-6).")
+    parser.add_argument("--err-dec", type=int, default=DEFAULT_ERR_DEC, choices=range(0, 7), metavar="N", help="Decimali dell'errore (0-6).")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="ades_converter",
+        description="Convertitore in formato ADES per file CANOPUS, Tycho e CSV.",
+    )
+    sub = parser.add_subparsers(dest="command")
+    conv = sub.add_parser("convert", help="Converte uno o più file senza interfaccia grafica.")
+    conv.add_argument("inputs", nargs="+", help="File o pattern (es. *.txt) da convertire.")
+    add_conversion_arguments(conv)
+    conv.add_argument("-o", "--out-dir", default=None, help="Cartella di output (predefinita: quella del file sorgente).")
+    conv.add_argument("-j", "--jobs", type=int, default=None, help="Processi paralleli (predefinito: numero di CPU).")
+    conv.add_argument("--incremental", action="store_true", help="Per file ALCDEF/Tycho in crescita converte solo le righe nuove e le accoda all'output.")
+    conv.add_argument("--stream", action="store_true", help="Elabora i file a blocchi senza caricarli interamente in memoria.")
+    conv.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_ROWS, metavar="N", help="Righe per blocco in modalità --stream.")
+    conv.add_argument("--widths", type=int, nargs=2, metavar=("MAG", "ERR"), help="Larghezze fisse delle colonne mag/magUnc (evita la prima lettura in --stream).")
+    conv.add_argument("-f", "--output-format", default="txt", choices=sorted(OUTPUT_FORMATS), help="Formato di output: tabella txt, ADES PSV o ADES XML (psv/xml sono scritti in streaming).")
+    conv.add_argument("--split-alcdef", action="store_true", help="Un file ADES per ogni blocco STARTMETADATA dei file ALCDEF, con MPC/oggetto/filtro presi dai metadati del blocco.")
+    conv.add_argument("--no-cache", action="store_true", help="Non usa la cache delle conversioni.")
+    conv.add_argument("--cache-dir", default=None, help="Cartella della cache (predefinita: cartella cache dell'utente).")
+    conv.add_argument("-v", "--verbose", action="store_true", help="Mostra gli avvisi di conversione.")
+    conv.add_argument("--profile", action="store_true", help="Mostra durata e righe/s di ogni fase (rilevamento, lettura, JD, arrotondamento, formattazione, scrittura).")
+    conv.add_argument("--profile-memory", action="store_true", help="Come --profile, con il picco di memoria per fase (tracemalloc).")
+    conv.add_argument("--profile-json", default=None, metavar="FILE", help="Salva i tempi per fase in JSON ('-' per stamparli su stdout).")
+    conv.add_argument("--cprofile", default=None, metavar="FILE", help="Salva un profilo cProfile della conversione (uno per file se più input).")
+    conv.set_defaults(func=run_convert)
+    watch = sub.add_parser("watch", help="Sorveglia una cartella e converte i file nuovi o cresciuti.")
+    watch.add_argument("directory", help="Cartella in cui il software di acquisizione scrive i file.")
+    add_conversion_arguments(watch)
+    watch.add_argument("-o", "--out-dir", default=None, help="Cartella di output (predefinita: DIRECTORY/ades).")
+    watch.add_argument("--pattern", action="append", help="Pattern dei file da convertire (ripetibile, predefinito: *.txt *.csv *.dat).")
+    watch.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="Intervallo di controllo in secondi.")
+    watch.add_argument("--state", default=None, help="File indice dei file già elaborati (predefinito: nella cartella di output).")
+    watch.add_argument("--incremental", action="store_true", help="Accoda solo le righe nuove dei file ALCDEF/Tycho in crescita.")
+    watch.add_argument("--once", action="store_true", help="Esegue un solo controllo ed esce.")
+    watch.set_defaults(func=run_watch)
+    serve = sub.add_parser("serve", help="Server HTTP locale per molte conversioni piccole con astropy già caricato.")
+    serve.add_argument("--host", default=SERVER_HOST, help="Indirizzo locale di ascolto (solo 127.0.0.1, ::1 o localhost).")
+    serve.add_argument("--port", type=int, default=SERVER_PORT, help="Porta TCP (0 = porta libera qualsiasi).")
+    serve.add_argument("-j", "--jobs", type=int, default=None, help="Processi di conversione (predefinito: numero di CPU).")
+    serve.add_argument("--queue-size", type=int, default=SERVER_QUEUE_SIZE, help="Richieste in attesa oltre ai processi attivi prima di rispondere 503.")
+    serve.add_argument("--timeout", type=float, default=SERVER_TIMEOUT, help="Secondi massimi per richiesta prima di rispondere 504.")
+    serve.add_argument("--max-mb", type=float, default=SERVER_MAX_BYTES / (1024 * 1024), help="Dimensione massima del file inviato (MB).")
+    serve.add_argument("--log-requests", action="store_true", help="Stampa una riga per ogni richiesta.")
+    serve.set_defaults(func=run_serve)
+    bench = sub.add_parser("bench", help="Benchmark delle fasi di conversione su dati sintetici.")
+    bench.add_argument("--formats", nargs="+", default=list(BENCH_FORMATS), choices=BENCH_FORMATS, help="Formati da generare.")
+    bench.add_argument("--sizes", nargs="+", type=int, default=list(BENCH_SIZES), help="Numero di righe (es. 1000 100000 10000000).")
+    bench.add_argument("--data-dir", default=None, help="Cartella dei dati sintetici (riutilizzati tra le esecuzioni).")
+    bench.add_argument("--repeat", type=int, default=1, help="Ripetizioni per file (si tiene la migliore).")
+    bench.add_argument("--parse-jobs", type=int, default=1, metavar="N", help="Legge i file CSV/Tycho grandi a blocchi su N processi.")
+    bench.add_argument("--memory", action="store_true", help="Misura il picco di memoria per fase con tracemalloc.")
+    bench.add_argument("--history", default=None, help="File JSONL in cui accumulare i risultati e confrontarli con l'esecuzione precedente.")
+    bench.add_argument("--json", default=None, help="Salva i risultati di questa esecuzione in JSON.")
+    bench.add_argument("--fail-on-regression", action="store_true", help="Esce con codice 1 se una fase è più lenta del 20% rispetto alla precedente.")
+    add_conversion_arguments(bench)
+    bench.set_defaults(func=run_bench)
+    jdc = sub.add_parser("jd-check", help="Confronta la conversione JD veloce con astropy su date casuali e casi limite.")
+    jdc.add_argument("--samples", type=int, default=20000, help="Date casuali per ogni numero di decimali (0-9).")
+    jdc.add_argument("--seed", type=int, default=0, help="Seme del generatore casuale.")
+    jdc.set_defaults(func=run_jd_check)
+    cc = sub.add_parser("cache-clear", help="Svuota la cache delle conversioni.")
+    cc.add_argument("--cache-dir", default=None, help="Cartella della cache (predefinita: cartella cache dell'utente).")
+    cc.set_defaults(func=run_cache_clear)
+    imp = sub.add_parser("importtime", help="Misura il tempo di import dei moduli senza interfaccia.")
+    imp.add_argument(
+        "modules",
+        nargs="*",
+        default=["ades_converter", "ades_converter.core", "ades_converter.cli"],
+        help="Moduli da misurare.",
+    )
+    imp.add_argument("--budget-ms", type=float, default=None, help="Tempo massimo ammesso per modulo (ms).")
+    imp.set_defaults(func=run_importtime)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        from .gui import main as gui_main
+        gui_main()
+        return
+    sys.exit(args.func(args))
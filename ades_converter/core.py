@@ -0,0 +1,1083 @@
+import os
+import csv
+import io
+import itertools
+import mmap
+import re
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import datetime
+
+import numpy as np
+
+from .cache import ConversionCache, first_obs_time
+from .profiling import NULL_PROFILER, StageProfiler
+from .utc import UTC_DAYS
+
+DEFAULT_DATE_DEC = 2
+DEFAULT_MAG_DEC = 1
+DEFAULT_ERR_DEC = 2
+SNIFF_MAX_BYTES = 64 * 1024
+DETECT_HEAD_CHARS = 8000
+STREAM_CHUNK_ROWS = 50000
+ADES_TEXT_HEADER = "#obsTime mag magUnc"
+FAST_ROUND_LIMIT = 1e15
+FAST_ROUND_TIE_TOL = 2.0 ** -40
+FAST_ROUND_MAX_CHARS = 16
+ALCDEF_FAST_LINE_BYTES = 40
+ALCDEF_FAST_MAX_FIELD = 32
+FAST_PARSE_MAX_DIGITS = 15
+FAST_PARSE_MAX_JD_DIGITS = 17
+
+Record = Tuple[float, float, float, str, str]
+
+
+class ConversionCancelled(Exception):
+    pass
+
+
+class ObsColumns(NamedTuple):
+    jd: np.ndarray
+    mag: np.ndarray
+    err: np.ndarray
+    mag_txt: Optional[List[str]] = None
+    err_txt: Optional[List[str]] = None
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.jd)
+
+
+def sniff_delimiter(sample: str) -> str:
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", " "])
+        return dialect.delimiter
+    except Exception:
+        return ","
+
+
+def sniff_delimiter_from_handle(f, max_lines: int = 10, max_bytes: int = SNIFF_MAX_BYTES) -> str:
+    start = f.tell()
+    head = ""
+    sample_lines: List[str] = []
+    while len(sample_lines) < max_lines and len(head) < max_bytes:
+        ln = f.readline(max_bytes)
+        if not ln:
+            break
+        head += ln
+        ln = ln.rstrip("\r\n")
+        if not ln.strip().startswith("#"):
+            sample_lines.append(ln)
+    f.seek(start)
+    sample = "\n".join(sample_lines) if sample_lines else head[:1000]
+    return sniff_delimiter(sample)
+
+
+def csv_is_blank_or_comment(raw: List[str]) -> bool:
+    return not raw or (len(raw) == 1 and raw[0].strip() == "") or raw[0].strip().startswith("#")
+
+
+def csv_header_indices(raw: List[str]) -> Optional[Tuple[int, int, int]]:
+    low = [c.strip().lower() for c in raw]
+    poss = {"jd": None, "mag": None, "magerr": None}
+    for i, name in enumerate(low):
+        if name == "jd":
+            poss["jd"] = i
+        elif name in ("mag", "magnitude"):
+            poss["mag"] = i
+        elif name in ("magerr", "mag_unc", "magunc", "err", "error"):
+            poss["magerr"] = i
+    if all(v is not None for v in poss.values()):
+        return poss["jd"], poss["mag"], poss["magerr"]
+    return None
+
+
+def scan_csv_rows(rows: Iterable[List[str]], jd_idx: int = 0, mag_idx: int = 1, magerr_idx: int = 2) -> Iterator[Record]:
+    max_idx = max(jd_idx, mag_idx, magerr_idx)
+    for raw in rows:
+        if csv_is_blank_or_comment(raw):
+            continue
+        if max_idx >= len(raw):
+            continue
+        jd_txt = raw[jd_idx].strip().replace(",", ".")
+        mag_txt = raw[mag_idx].strip().replace(",", ".")
+        magerr_txt = raw[magerr_idx].strip().replace(",", ".")
+        try:
+            jd_val = float(jd_txt)
+            mag_val = float(mag_txt)
+            err_val = float(magerr_txt)
+        except ValueError:
+            continue
+        yield jd_val, mag_val, err_val, mag_txt, magerr_txt
+
+
+def scan_csv_jd_mag_err(path: str) -> Iterator[Record]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        delimiter = sniff_delimiter_from_handle(f)
+        reader = csv.reader(f, delimiter=delimiter)
+        for raw in reader:
+            if csv_is_blank_or_comment(raw):
+                continue
+            indices = csv_header_indices(raw)
+            if indices is None:
+                indices = (0, 1, 2)
+                reader = itertools.chain([raw], reader)
+            yield from scan_csv_rows(reader, *indices)
+            return
+
+
+def iter_csv_jd_mag_err(path: str) -> Iterator[Tuple[float, str, str]]:
+    return _as_rows(scan_csv_jd_mag_err(path))
+
+
+def read_csv_jd_mag_err(path: str) -> List[Tuple[float, str, str]]:
+    return list(iter_csv_jd_mag_err(path))
+
+
+def parse_alcdef_line(line: str) -> Optional[Record]:
+    line = line.strip()
+    if not line or not line.startswith("DATA="):
+        return None
+    payload = line.split("=", 1)[1]
+    parts = [p.strip() for p in payload.split("|")]
+    if len(parts) < 3:
+        return None
+    jd_txt, mag_txt, err_txt = parts[0], parts[1].replace("+", ""), parts[2].replace("+", "")
+    try:
+        jd_val = float(jd_txt)
+        mag_val = float(mag_txt)
+        err_val = float(err_txt)
+    except ValueError:
+        return None
+    return jd_val, mag_val, err_val, mag_txt, err_txt
+
+
+def scan_canopus_alcdef(path: str) -> Iterator[Record]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            rec = parse_alcdef_line(line)
+            if rec is not None:
+                yield rec
+
+
+def iter_canopus_alcdef(path: str) -> Iterator[Tuple[float, str, str]]:
+    return _as_rows(scan_canopus_alcdef(path))
+
+
+def read_canopus_alcdef(path: str) -> List[Tuple[float, str, str]]:
+    return list(iter_canopus_alcdef(path))
+
+
+def read_alcdef_generic(path: str) -> List[Tuple[float, str, str]]:
+    return read_canopus_alcdef(path)
+
+
+ASCII_PRINTABLE = re.compile(rb"[!-~]")
+
+
+def _parse_decimal_fields(
+    buf: np.ndarray, start: np.ndarray, end: np.ndarray, max_digits: int, max_chars: int
+) -> Optional[np.ndarray]:
+    # Accetta solo [spazi][+-]cifre[.cifre][spazi] e calcola mantissa / 10**k: con mantissa < 2**53
+    # la divisione è arrotondata correttamente come float(testo). Ogni altra forma restituisce None
+    # e il blocco passa al lettore riga per riga, che resta il riferimento.
+    n = len(start)
+    if not n:
+        return np.empty(0)
+    width = int((end - start).max())
+    if width <= 0 or width > ALCDEF_FAST_MAX_FIELD:
+        return None
+    if int(start.max()) + width > len(buf):
+        buf = np.concatenate((buf, np.zeros(width, dtype=np.uint8)))
+    ch = np.lib.stride_tricks.sliding_window_view(buf, width)[start]
+    ch[np.arange(width) >= (end - start)[:, None]] = 32
+    bad = np.zeros(n, dtype=bool)
+    started = np.zeros(n, dtype=bool)
+    ended = np.zeros(n, dtype=bool)
+    seen_dot = np.zeros(n, dtype=bool)
+    neg = np.zeros(n, dtype=bool)
+    n_digits = np.zeros(n, dtype=np.int64)
+    n_chars = np.zeros(n, dtype=np.int64)
+    frac = np.zeros(n, dtype=np.int64)
+    mantissa = np.zeros(n, dtype=np.int64)
+    for c in np.ascontiguousarray(ch.T):
+        space = (c == 32) | (c == 9) | (c == 13)
+        value = c - np.uint8(48)
+        digit = value < 10
+        dot = c == 46
+        minus = c == 45
+        sign = minus | (c == 43)
+        body = ~space
+        bad |= ~(space | digit | dot | sign) | (body & ended) | (sign & started) | (dot & seen_dot)
+        ended |= space & started
+        started |= body
+        neg |= minus
+        frac += digit & seen_dot
+        seen_dot |= dot
+        n_digits += digit
+        n_chars += body & (c != 43)
+        mantissa = np.where(digit, mantissa * 10 + value, mantissa)
+    bad |= (n_digits == 0) | (n_digits > max_digits) | (n_chars > max_chars) | (mantissa >= 2 ** 53)
+    if bad.any():
+        return None
+    values = mantissa / 10.0 ** frac
+    return np.where(neg, -values, values)
+
+
+def _parse_alcdef_block(buf: np.ndarray) -> Optional[ObsColumns]:
+    if not buf.all():
+        return None
+    cr = np.flatnonzero(buf == 13)
+    if len(cr) and (cr[-1] + 1 >= len(buf) or (buf[cr + 1] != 10).any()):
+        return None
+    nl = np.flatnonzero(buf == 10)
+    starts = np.concatenate(([0], nl + 1))
+    ends = np.concatenate((nl, [len(buf)]))
+    tag = b"DATA="
+    hit = buf[: len(buf) - 4] == tag[0]
+    for k in range(1, 5):
+        hit &= buf[k : len(buf) - 4 + k] == tag[k]
+    found = np.flatnonzero(hit)
+    line_idx = np.searchsorted(starts, found, side="right") - 1
+    at_start = starts[line_idx] == found
+    for i in np.flatnonzero(~at_start):
+        # "DATA=" a metà riga (es. REVISEDDATA=) conta solo se preceduto da soli spazi
+        if ASCII_PRINTABLE.search(buf[starts[line_idx[i]] : found[i]].tobytes()) is None:
+            return None
+    data_starts = found[at_start]
+    line_ends = ends[line_idx[at_start]]
+    pipes = np.concatenate((np.flatnonzero(buf == 124), np.full(3, len(buf))))
+    k = np.searchsorted(pipes, data_starts + 5)
+    p1, p2, p3 = pipes[k], pipes[k + 1], pipes[k + 2]
+    if (p2 >= line_ends).any():
+        return None
+    p3 = np.minimum(p3, line_ends)
+    jd = _parse_decimal_fields(buf, data_starts + 5, p1, FAST_PARSE_MAX_JD_DIGITS, ALCDEF_FAST_MAX_FIELD)
+    mag = _parse_decimal_fields(buf, p1 + 1, p2, FAST_PARSE_MAX_DIGITS, FAST_ROUND_MAX_CHARS)
+    err = _parse_decimal_fields(buf, p2 + 1, p3, FAST_PARSE_MAX_DIGITS, FAST_ROUND_MAX_CHARS)
+    if jd is None or mag is None or err is None:
+        return None
+    return ObsColumns(jd, mag, err)
+
+
+def _scan_alcdef_bytes(data: bytes) -> Iterator[Record]:
+    for line in io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace"):
+        rec = parse_alcdef_line(line)
+        if rec is not None:
+            yield rec
+
+
+def iter_alcdef_column_chunks(
+    path: str,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    keep_text: bool = True,
+    start: int = 0,
+    stop: Optional[int] = None,
+) -> Iterator[ObsColumns]:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block_bytes = max(1, chunk_size) * ALCDEF_FAST_LINE_BYTES
+            size = size if stop is None else min(stop, size)
+            while start < size:
+                end = mm.find(b"\n", min(start + block_bytes, size) - 1, size)
+                end = size if end < 0 else end + 1
+                block = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+                cols = _parse_alcdef_block(block)
+                del block
+                if cols is None:
+                    cols = columns_from_records(_scan_alcdef_bytes(mm[start:end]), keep_text)
+                if cols.n_rows:
+                    yield cols
+                start = end
+
+
+def read_alcdef_columns(path: str, keep_text: bool = True) -> ObsColumns:
+    return concat_columns(list(iter_alcdef_column_chunks(path, keep_text=keep_text)))
+
+
+def scan_canopus_observations_table(path: str) -> Iterator[Record]:
+    in_table = False
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            ln = raw.strip()
+            if not ln:
+                continue
+            if not in_table:
+                if set(ln) == set("-"):
+                    in_table = True
+                continue
+            if ln[0] not in ("Y", "N"):
+                continue
+            parts = ln.split()
+            if len(parts) < 5:
+                continue
+            if parts[0] != "Y":
+                continue
+            try:
+                jd_val = float(parts[1])
+            except ValueError:
+                continue
+            mag_txt = parts[-2].replace("+", "")
+            err_txt = parts[-1].replace("+", "")
+            try:
+                mag_val = float(mag_txt)
+                err_val = float(err_txt)
+            except ValueError:
+                continue
+            yield jd_val, mag_val, err_val, mag_txt, err_txt
+
+
+def iter_canopus_observations_table(path: str) -> Iterator[Tuple[float, str, str]]:
+    return _as_rows(scan_canopus_observations_table(path))
+
+
+def read_canopus_observations_table(path: str) -> List[Tuple[float, str, str]]:
+    return list(iter_canopus_observations_table(path))
+
+
+def parse_tycho_line(line: str) -> Optional[Record]:
+    parts = line.split()
+    if len(parts) < 3:
+        return None
+    jd_txt, mag_txt, err_txt = parts[0], parts[1].replace("+", ""), parts[2].replace("+", "")
+    try:
+        jd_val = float(jd_txt)
+        mag_val = float(mag_txt)
+        err_val = float(err_txt)
+    except ValueError:
+        return None
+    return jd_val, mag_val, err_val, mag_txt, err_txt
+
+
+def scan_tycho_lines(lines: Iterable[str]) -> Iterator[Record]:
+    for raw in lines:
+        ln = raw.strip()
+        if not ln:
+            continue
+        rec = parse_tycho_line(ln)
+        if rec is not None:
+            yield rec
+
+
+def is_tycho_header(line: str) -> bool:
+    head_parts = line.split()
+    return len(head_parts) >= 3 and head_parts[0].upper() == "JD"
+
+
+def scan_tycho_fotometry_whitespace(path: str) -> Iterator[Record]:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        first = f.readline()
+        if not is_tycho_header(first):
+            yield from scan_tycho_lines([first])
+        yield from scan_tycho_lines(f)
+
+
+def iter_tycho_fotometry_whitespace(path: str) -> Iterator[Tuple[float, str, str]]:
+    return _as_rows(scan_tycho_fotometry_whitespace(path))
+
+
+def read_tycho_fotometry_whitespace(path: str) -> List[Tuple[float, str, str]]:
+    return list(iter_tycho_fotometry_whitespace(path))
+
+
+def _as_rows(records: Iterable[Record]) -> Iterator[Tuple[float, str, str]]:
+    return ((r[0], r[3], r[4]) for r in records)
+
+
+class InputFormat(NamedTuple):
+    name: str
+    detect: Callable[[str, str], float]
+    scan: Callable[[str], Iterator[Record]]
+    iter_columns: Optional[Callable[[str, int, bool], Iterator[ObsColumns]]] = None
+
+
+INPUT_FORMATS: List[InputFormat] = []
+
+
+def register_input_format(
+    name: str,
+    detect: Callable[[str, str], float],
+    scan: Callable[[str], Iterator[Record]],
+    index: Optional[int] = None,
+    iter_columns: Optional[Callable[[str, int, bool], Iterator[ObsColumns]]] = None,
+) -> InputFormat:
+    fmt = InputFormat(name, detect, scan, iter_columns)
+    INPUT_FORMATS[:] = [f for f in INPUT_FORMATS if f.name != name]
+    if index is None:
+        INPUT_FORMATS.append(fmt)
+    else:
+        INPUT_FORMATS.insert(index, fmt)
+    return fmt
+
+
+def get_input_format(name: str) -> InputFormat:
+    for fmt in INPUT_FORMATS:
+        if fmt.name == name:
+            return fmt
+    raise KeyError(name)
+
+
+def _first_nonempty_line(head: str) -> str:
+    for ln in head.splitlines():
+        s = ln.strip()
+        if s:
+            return s
+    return ""
+
+
+def detect_alcdef(head: str, head_low: str) -> float:
+    if ("startmetadata" in head_low or "alcdef" in head_low) and "data=" in head_low:
+        return 1.0
+    return 0.0
+
+
+def detect_canopus_observations(head: str, head_low: str) -> float:
+    if "observation data" in head_low and "o-cavg" in head_low and "err" in head_low:
+        return 0.9
+    return 0.0
+
+
+def detect_tycho_fotometry(head: str, head_low: str) -> float:
+    parts = _first_nonempty_line(head).split()
+    if len(parts) >= 3 and parts[0].upper() == "JD" and parts[1].upper().startswith("MAG") and parts[2].upper().startswith("ERR"):
+        return 0.8
+    return 0.0
+
+
+def detect_csv(head: str, head_low: str) -> float:
+    return 0.1
+
+
+register_input_format("ALCDEF", detect_alcdef, scan_canopus_alcdef, iter_columns=iter_alcdef_column_chunks)
+register_input_format("CANOPUS Observations", detect_canopus_observations, scan_canopus_observations_table)
+register_input_format("Tycho Fotometry", detect_tycho_fotometry, scan_tycho_fotometry_whitespace)
+register_input_format("CSV", detect_csv, scan_csv_jd_mag_err)
+
+
+def read_head(path: str, size: int = DETECT_HEAD_CHARS) -> str:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read(size)
+    except Exception:
+        return ""
+
+
+def detect_input_format(path: str) -> Tuple[InputFormat, float]:
+    t0 = time.perf_counter()
+    head = read_head(path)
+    head_low = head.lower()
+    best: Optional[InputFormat] = None
+    best_score = 0.0
+    for fmt in INPUT_FORMATS:
+        try:
+            score = float(fmt.detect(head, head_low))
+        except Exception:
+            continue
+        if best is None or score > best_score:
+            best, best_score = fmt, score
+    if best is None:
+        best = get_input_format("CSV")
+    return best, time.perf_counter() - t0
+
+
+def scan_any_input(path: str, fmt: Optional[InputFormat] = None) -> Iterator[Record]:
+    if fmt is None:
+        fmt, _ = detect_input_format(path)
+    return fmt.scan(path)
+
+
+def iter_any_input(path: str) -> Iterator[Tuple[float, str, str]]:
+    return _as_rows(scan_any_input(path))
+
+
+def read_any_input(path: str) -> List[Tuple[float, str, str]]:
+    return list(iter_any_input(path))
+
+
+def columns_from_records(records: Iterable[Record], keep_text: bool = True) -> ObsColumns:
+    jd = array("d")
+    mag = array("d")
+    err = array("d")
+    mag_txt: Optional[List[str]] = [] if keep_text else None
+    err_txt: Optional[List[str]] = [] if keep_text else None
+    for jd_val, mag_val, err_val, m_txt, e_txt in records:
+        jd.append(jd_val)
+        mag.append(mag_val)
+        err.append(err_val)
+        if keep_text:
+            mag_txt.append(m_txt)
+            err_txt.append(e_txt)
+    return ObsColumns(
+        np.frombuffer(jd, dtype=np.float64),
+        np.frombuffer(mag, dtype=np.float64),
+        np.frombuffer(err, dtype=np.float64),
+        mag_txt,
+        err_txt,
+    )
+
+
+def read_any_columns(path: str, keep_text: bool = True, fmt: Optional[InputFormat] = None, jobs: int = 1) -> ObsColumns:
+    if fmt is None:
+        fmt, _ = detect_input_format(path)
+    if jobs > 1:
+        from .parallel import read_columns_parallel
+
+        return read_columns_parallel(path, jobs, keep_text, fmt)
+    if fmt.iter_columns is not None:
+        return concat_columns(list(fmt.iter_columns(path, STREAM_CHUNK_ROWS, keep_text)))
+    return columns_from_records(scan_any_input(path, fmt), keep_text)
+
+
+def iter_column_chunks(
+    path: str, chunk_size: int = STREAM_CHUNK_ROWS, keep_text: bool = True, fmt: Optional[InputFormat] = None
+) -> Iterator[ObsColumns]:
+    if fmt is None:
+        fmt, _ = detect_input_format(path)
+    if fmt.iter_columns is not None:
+        yield from fmt.iter_columns(path, chunk_size, keep_text)
+        return
+    records = scan_any_input(path, fmt)
+    while True:
+        cols = columns_from_records(itertools.islice(records, chunk_size), keep_text)
+        if not cols.n_rows:
+            break
+        yield cols
+
+
+def jd_to_isot_z(jd_val: float, precision: int = 2) -> str:
+    from astropy.time import Time
+
+    t = Time(jd_val, format="jd", scale="utc", precision=precision)
+    return f"{t.utc.isot}Z"
+
+
+def jd_array_to_isot_z(
+    jds: Sequence[float],
+    precision: int = 2,
+    on_error: Optional[Callable[[float, Exception], None]] = None,
+    engine: str = "fast",
+) -> List[Optional[str]]:
+    jd_arr = np.asarray(jds, dtype=float).ravel()
+    out: List[Optional[str]] = [None] * len(jd_arr)
+    if not len(jd_arr):
+        return out
+    finite = np.isfinite(jd_arr)
+    bad_idx = np.flatnonzero(~finite)
+    if engine == "fast":
+        # giorni UTC regolari dalla cache per giorno; secondi intercalari e date prima del 1972 restano ad astropy
+        handled, isots = UTC_DAYS.format_isot_z(jd_arr, precision)
+        if len(isots) == len(jd_arr):
+            return isots
+        for i, isot in zip(np.flatnonzero(handled), isots):
+            out[i] = isot
+        finite &= ~handled
+    good_idx = np.flatnonzero(finite)
+    if len(good_idx):
+        from astropy.time import Time
+
+        try:
+            t = Time(jd_arr[good_idx], format="jd", scale="utc", precision=precision)
+            for i, isot in zip(good_idx, t.utc.isot):
+                out[i] = f"{isot}Z"
+        except Exception:
+            bad_idx = np.arange(len(jd_arr))
+    for i in bad_idx:
+        if out[i] is not None:
+            continue
+        try:
+            out[i] = jd_to_isot_z(float(jd_arr[i]), precision=precision)
+        except Exception as e:
+            if on_error is not None:
+                on_error(float(jd_arr[i]), e)
+    return out
+
+
+def to_n_decimals(s: str, n: int) -> str:
+    try:
+        d = Decimal(s)
+    except Exception:
+        d = Decimal(str(float(s)))
+    q = Decimal("1").scaleb(-n)
+    return str(d.quantize(q, rounding=ROUND_HALF_UP))
+
+
+def to_n_decimals_array(values: Sequence[float], n: int, texts: Optional[Sequence[str]] = None) -> List[str]:
+    vals = np.asarray(values, dtype=float)
+    scale = 10.0 ** n
+    scaled = np.abs(vals) * scale
+    rounded = np.floor(scaled + 0.5)
+    fast = np.isfinite(scaled) & (scaled < FAST_ROUND_LIMIT)
+    with np.errstate(invalid="ignore"):
+        tie_dist = np.abs(scaled - np.floor(scaled) - 0.5)
+        fast &= tie_dist > np.maximum(scaled, 1.0) * FAST_ROUND_TIE_TOL
+    if texts is not None:
+        fast &= np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)) <= FAST_ROUND_MAX_CHARS
+    fmt = f"%.{n}f".__mod__
+    out = list(map(fmt, (np.copysign(rounded, vals) / scale).tolist()))
+    for i in np.flatnonzero(~fast):
+        src = texts[i] if texts is not None else repr(float(vals[i]))
+        out[i] = to_n_decimals(src, n)
+    return out
+
+
+def _parsed_or_none(texts: Sequence[str]) -> Optional[np.ndarray]:
+    try:
+        return np.asarray(texts, dtype=float)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_decimals(texts: Sequence[str], n: int) -> List[str]:
+    vals = _parsed_or_none(texts)
+    if vals is None:
+        return [to_n_decimals(x, n) for x in texts]
+    return to_n_decimals_array(vals, n, texts)
+
+
+def format_line(obs_time: str, mag_fmt: str, err_fmt: str, w_mag: int, w_err: int) -> str:
+    return f"{obs_time} {mag_fmt:>{w_mag}} {err_fmt:>{w_err}}"
+
+
+def layout_columns(obs_times: List[str], mags_fmt: List[str], errs_fmt: List[str]) -> List[str]:
+    w_mag = max(3, *(len(s) for s in mags_fmt))
+    w_err = max(3, *(len(s) for s in errs_fmt))
+    lines = [ADES_TEXT_HEADER]
+    for t, m, e in zip(obs_times, mags_fmt, errs_fmt):
+        lines.append(format_line(t, m, e, w_mag, w_err))
+    return lines
+
+
+def format_columns(obs_times: List[str], mags: List[str], magerrs: List[str], mag_dec: int, err_dec: int) -> List[str]:
+    return layout_columns(obs_times, format_decimals(mags, mag_dec), format_decimals(magerrs, err_dec))
+
+
+def format_mag_err(cols: ObsColumns, mag_dec: int, err_dec: int) -> Tuple[List[str], List[str]]:
+    return (
+        to_n_decimals_array(cols.mag, mag_dec, cols.mag_txt),
+        to_n_decimals_array(cols.err, err_dec, cols.err_txt),
+    )
+
+
+def scan_column_widths(chunks: Iterable[ObsColumns], mag_dec: int, err_dec: int) -> Tuple[int, int]:
+    w_mag = w_err = 3
+    for cols in chunks:
+        mags_fmt, errs_fmt = format_mag_err(cols, mag_dec, err_dec)
+        w_mag = max(w_mag, *(len(s) for s in mags_fmt))
+        w_err = max(w_err, *(len(s) for s in errs_fmt))
+    return w_mag, w_err
+
+
+def sanitize_token_keep_underscore(s: str) -> str:
+    s = (s or "").strip().upper().replace(" ", "_")
+    s = re.sub(r"[^A-Z0-9_]", "", s)
+    return s or "NA"
+
+
+def sanitize_token_no_space(s: str) -> str:
+    s = (s or "").strip().upper().replace(" ", "")
+    s = re.sub(r"[^A-Z0-9]", "", s)
+    return s or "NA"
+
+
+def build_suggested_filename(obs_times: List[str], n_obs: int, mpc: str, obj: str, filt: str) -> str:
+    if not obs_times:
+        date_tag = datetime.utcnow().strftime("%Y%m%d") + "UTC"
+    else:
+        iso0 = obs_times[0]
+        yyyy_mm_dd = iso0[:10]
+        try:
+            date_tag = datetime.strptime(yyyy_mm_dd, "%Y-%m-%d").strftime("%Y%m%d") + "UTC"
+        except Exception:
+            date_tag = datetime.utcnow().strftime("%Y%m%d") + "UTC"
+    mpc = sanitize_token_keep_underscore(mpc)
+    obj = sanitize_token_no_space(obj)
+    filt = sanitize_token_keep_underscore(filt)
+    return f"{date_tag}_{mpc}_{obj}_{n_obs}_{filt}"
+
+
+def convert_rows(
+    rows: List[Tuple[float, str, str]],
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    on_warn: Optional[Callable[[str], None]] = None,
+) -> Tuple[List[str], List[str]]:
+    def warn(jd: float, e: Exception):
+        if on_warn is not None:
+            on_warn(f"[WARN] JD {jd} non convertibile: {e}")
+
+    obs_times: List[str] = []
+    mags: List[str] = []
+    errs: List[str] = []
+    isots = jd_array_to_isot_z([r[0] for r in rows], precision=date_dec, on_error=warn)
+    for t_isot, (_, mag_txt, err_txt) in zip(isots, rows):
+        if t_isot is None:
+            continue
+        obs_times.append(t_isot)
+        mags.append(mag_txt)
+        errs.append(err_txt)
+    if not obs_times:
+        return obs_times, []
+    lines = format_columns(obs_times, mags, errs, mag_dec=mag_dec, err_dec=err_dec)
+    return obs_times, lines
+
+
+def take_columns(cols: ObsColumns, idx: Sequence[int]) -> ObsColumns:
+    idx = np.asarray(idx, dtype=np.intp)
+    return ObsColumns(
+        cols.jd[idx],
+        cols.mag[idx],
+        cols.err[idx],
+        [cols.mag_txt[i] for i in idx] if cols.mag_txt is not None else None,
+        [cols.err_txt[i] for i in idx] if cols.err_txt is not None else None,
+    )
+
+
+def concat_columns(chunks: List[ObsColumns]) -> ObsColumns:
+    if not chunks:
+        return ObsColumns(np.empty(0), np.empty(0), np.empty(0), [], [])
+    keep_text = any(c.mag_txt is not None for c in chunks)
+    return ObsColumns(
+        np.concatenate([c.jd for c in chunks]),
+        np.concatenate([c.mag for c in chunks]),
+        np.concatenate([c.err for c in chunks]),
+        [t for c in chunks for t in _column_texts(c.mag, c.mag_txt)] if keep_text else None,
+        [t for c in chunks for t in _column_texts(c.err, c.err_txt)] if keep_text else None,
+    )
+
+
+def _column_texts(values: np.ndarray, texts: Optional[List[str]]) -> List[str]:
+    # i blocchi letti dal percorso veloce non hanno testo: repr() ha lo stesso valore decimale
+    return texts if texts is not None else list(map(repr, values.tolist()))
+
+
+def convert_columns_to_isot(
+    cols: ObsColumns,
+    date_dec: int = DEFAULT_DATE_DEC,
+    on_warn: Optional[Callable[[str], None]] = None,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Tuple[List[str], ObsColumns]:
+    def warn(jd: float, e: Exception):
+        if on_warn is not None:
+            on_warn(f"[WARN] JD {jd} non convertibile: {e}")
+
+    n = cols.n_rows
+    isots: List[Optional[str]] = []
+    for start in range(0, n, chunk_size):
+        if should_stop is not None and should_stop():
+            raise ConversionCancelled()
+        isots.extend(jd_array_to_isot_z(cols.jd[start:start + chunk_size], precision=date_dec, on_error=warn))
+        if on_progress is not None:
+            on_progress(min(start + chunk_size, n), n)
+    keep = [i for i, t in enumerate(isots) if t is not None]
+    if len(keep) == len(isots):
+        return isots, cols
+    return [isots[i] for i in keep], take_columns(cols, keep)
+
+
+def convert_columns(
+    cols: ObsColumns,
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    on_warn: Optional[Callable[[str], None]] = None,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    profiler: Optional[StageProfiler] = None,
+) -> Tuple[List[str], List[str]]:
+    prof = profiler or NULL_PROFILER
+    with prof.stage("jd", cols.n_rows):
+        obs_times, cols = convert_columns_to_isot(cols, date_dec, on_warn, chunk_size, on_progress, should_stop)
+    if not obs_times:
+        return obs_times, []
+    with prof.stage("round", cols.n_rows):
+        mags_fmt, errs_fmt = format_mag_err(cols, mag_dec, err_dec)
+    with prof.stage("format", cols.n_rows):
+        lines = layout_columns(obs_times, mags_fmt, errs_fmt)
+    return obs_times, lines
+
+
+def write_lines(out_path: str, lines: List[str]):
+    with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def apply_umask_mode(path: str):
+    # mkstemp crea i file con permessi 0600: prima del rename si riportano a quelli di un open() normale
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(path, 0o666 & ~umask)
+
+
+def place_outputs(results: List[Dict[str, Any]], used: Optional[set] = None):
+    # rinomina i file temporanei nel nome proposto; i nomi già usati in questa esecuzione ricevono _2, _3, ...
+    used = set() if used is None else used
+    for r in results:
+        tmp_path = r.pop("tmp_path", None)
+        name = r.pop("out_name", None)
+        if tmp_path is None:
+            continue
+        out_dir = os.path.dirname(tmp_path)
+        stem, ext = os.path.splitext(name)
+        out_path = os.path.join(out_dir, name)
+        n = 2
+        while os.path.abspath(out_path) in used:
+            out_path = os.path.join(out_dir, f"{stem}_{n}{ext}")
+            n += 1
+        used.add(os.path.abspath(out_path))
+        os.replace(tmp_path, out_path)
+        r["out_path"] = out_path
+
+
+class OutputFormat(NamedTuple):
+    name: str
+    extension: str
+    open: Callable[[TextIO, Dict[str, Any], Tuple[int, int]], Any]
+    needs_widths: bool = True
+
+
+OUTPUT_FORMATS: Dict[str, OutputFormat] = {}
+
+
+def register_output_format(
+    name: str,
+    extension: str,
+    open: Callable[[TextIO, Dict[str, Any], Tuple[int, int]], Any],
+    needs_widths: bool = True,
+) -> OutputFormat:
+    fmt = OutputFormat(name, extension, open, needs_widths)
+    OUTPUT_FORMATS[name] = fmt
+    return fmt
+
+
+class TextTableWriter:
+    def __init__(self, out: TextIO, context: Dict[str, Any], widths: Tuple[int, int]):
+        self.out = out
+        self.w_mag, self.w_err = widths
+        out.write(ADES_TEXT_HEADER + "\n")
+
+    def write_rows(self, obs_times: Sequence[str], mags_fmt: Sequence[str], errs_fmt: Sequence[str]):
+        w_mag, w_err = self.w_mag, self.w_err
+        self.out.writelines(format_line(t, m, e, w_mag, w_err) + "\n" for t, m, e in zip(obs_times, mags_fmt, errs_fmt))
+
+    def close(self):
+        pass
+
+
+register_output_format("txt", ".txt", TextTableWriter)
+
+
+def output_context(mpc: str = "", obj: str = "", filt: str = "", date_dec: int = DEFAULT_DATE_DEC) -> Dict[str, Any]:
+    return {"mpc": mpc, "obj": obj, "filt": filt, "date_dec": date_dec}
+
+
+def render_output(out: TextIO, lines: List[str], output_format: str = "txt", context: Optional[Dict[str, Any]] = None):
+    if output_format == "txt":
+        out.write("\n".join(lines) + "\n")
+        return
+    rows = [ln.split() for ln in lines[1:]]
+    obs_times, mags_fmt, errs_fmt = (list(c) for c in zip(*rows)) if rows else ([], [], [])
+    widths = (max(3, *map(len, mags_fmt)), max(3, *map(len, errs_fmt))) if rows else (3, 3)
+    writer = OUTPUT_FORMATS[output_format].open(out, context or output_context(), widths)
+    writer.write_rows(obs_times, mags_fmt, errs_fmt)
+    writer.close()
+
+
+def write_output(out_path: str, lines: List[str], output_format: str = "txt", context: Optional[Dict[str, Any]] = None):
+    if output_format == "txt":
+        write_lines(out_path, lines)
+        return
+    with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+        render_output(f, lines, output_format, context)
+
+
+def new_result(path: str) -> Dict[str, Any]:
+    return {
+        "path": path,
+        "format": None,
+        "rows": 0,
+        "n_obs": 0,
+        "out_path": None,
+        "warnings": [],
+        "error": None,
+        "cached": False,
+        "seconds": 0.0,
+    }
+
+
+def convert_file(
+    path: str,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    out_dir: Optional[str] = None,
+    cache: Optional[ConversionCache] = None,
+    profiler: Optional[StageProfiler] = None,
+    parse_jobs: int = 1,
+    defer_placement: bool = False,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result = new_result(path)
+    warnings: List[str] = result["warnings"]
+    tmp_path = None
+    prof = profiler or NULL_PROFILER
+    prof.start()
+    try:
+        with prof.stage("detect"):
+            fmt, detect_seconds = detect_input_format(path)
+        result["format"] = fmt.name
+        result["detect_seconds"] = detect_seconds
+        cache_key = hit = None
+        if cache is not None:
+            with prof.stage("cache"):
+                cache_key = cache.key(path, date_dec, mag_dec, err_dec, fmt.name)
+                hit = cache.get(cache_key)
+        if hit is not None:
+            result["rows"], lines = hit
+            result["cached"] = True
+            obs_times = first_obs_time(lines)
+        else:
+            with prof.stage("read") as st:
+                cols = read_any_columns(path, fmt=fmt, jobs=parse_jobs)
+                st.rows = cols.n_rows
+            result["rows"] = cols.n_rows
+            if not cols.n_rows:
+                result["error"] = "Nessuna riga valida trovata (JD, Mag, MagErr)."
+                return result
+            obs_times, lines = convert_columns(cols, date_dec, mag_dec, err_dec, on_warn=warnings.append, profiler=prof)
+            if not obs_times:
+                result["error"] = "Tutte le conversioni JD sono fallite."
+                return result
+            if cache is not None:
+                with prof.stage("cache"):
+                    cache.put(cache_key, cols.n_rows, lines)
+        n_obs = len(lines) - 1
+        out_name = build_suggested_filename(obs_times, n_obs, mpc, obj, filt) + ".txt"
+        out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+        if defer_placement:
+            # il chiamante sceglie il nome definitivo con place_outputs()
+            fd, tmp_path = tempfile.mkstemp(prefix=".ades_", suffix=".tmp", dir=out_dir)
+            os.close(fd)
+            with prof.stage("write", n_obs):
+                write_lines(tmp_path, lines)
+            apply_umask_mode(tmp_path)
+            result["tmp_path"], result["out_name"] = tmp_path, out_name
+            tmp_path = None
+        else:
+            out_path = os.path.join(out_dir, out_name)
+            with prof.stage("write", n_obs):
+                write_lines(out_path, lines)
+            result["out_path"] = out_path
+        result["n_obs"] = n_obs
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        prof.stop()
+        result["seconds"] = time.perf_counter() - t0
+        if prof.enabled:
+            result["stages"] = prof.as_dict()
+    return result
+
+
+def convert_file_streaming(
+    path: str,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    out_dir: Optional[str] = None,
+    chunk_size: int = STREAM_CHUNK_ROWS,
+    widths: Optional[Tuple[int, int]] = None,
+    profiler: Optional[StageProfiler] = None,
+    output_format: str = "txt",
+    defer_placement: bool = False,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result = new_result(path)
+    warnings: List[str] = result["warnings"]
+    tmp_path = None
+    prof = profiler or NULL_PROFILER
+    prof.start()
+    try:
+        with prof.stage("detect"):
+            fmt, result["detect_seconds"] = detect_input_format(path)
+        result["format"] = fmt.name
+        out_fmt = OUTPUT_FORMATS[output_format]
+        if widths is None and out_fmt.needs_widths:
+            with prof.stage("widths"):
+                widths = scan_column_widths(iter_column_chunks(path, chunk_size, fmt=fmt), mag_dec, err_dec)
+        out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".ades_", suffix=".tmp", dir=out_dir)
+        first_time: Optional[str] = None
+        n_rows = n_obs = 0
+        with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as out:
+            writer = out_fmt.open(out, output_context(mpc, obj, filt, date_dec), widths or (3, 3))
+            chunks = iter_column_chunks(path, chunk_size, fmt=fmt)
+            while True:
+                with prof.stage("read") as st:
+                    cols = next(chunks, None)
+                    st.rows = cols.n_rows if cols is not None else 0
+                if cols is None:
+                    break
+                n_rows += cols.n_rows
+                with prof.stage("jd", cols.n_rows):
+                    obs_times, cols = convert_columns_to_isot(cols, date_dec, on_warn=warnings.append)
+                if not obs_times:
+                    continue
+                if first_time is None:
+                    first_time = obs_times[0]
+                with prof.stage("round", cols.n_rows):
+                    mags_fmt, errs_fmt = format_mag_err(cols, mag_dec, err_dec)
+                with prof.stage("write", len(obs_times)):
+                    writer.write_rows(obs_times, mags_fmt, errs_fmt)
+                n_obs += len(obs_times)
+            writer.close()
+        result["rows"] = n_rows
+        if not n_rows:
+            result["error"] = "Nessuna riga valida trovata (JD, Mag, MagErr)."
+            return result
+        if first_time is None:
+            result["error"] = "Tutte le conversioni JD sono fallite."
+            return result
+        out_name = build_suggested_filename([first_time], n_obs, mpc, obj, filt) + out_fmt.extension
+        apply_umask_mode(tmp_path)
+        if defer_placement:
+            result["tmp_path"], result["out_name"] = tmp_path, out_name
+        else:
+            out_path = os.path.join(out_dir, out_name)
+            os.replace(tmp_path, out_path)
+            result["out_path"] = out_path
+        tmp_path = None
+        result["n_obs"] = n_obs
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        prof.stop()
+        result["seconds"] = time.perf_counter() - t0
+        if prof.enabled:
+            result["stages"] = prof.as_dict()
+    return result
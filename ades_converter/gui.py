@@ -0,0 +1,638 @@
+import os
+import sys
+import threading
+import time
+from typing import List, Optional
+from PyQt5 import QtWidgets, QtCore, QtGui
+
+try:
+    import qdarkstyle  # type: ignore
+    QDARKSTYLE_AVAILABLE = True
+except Exception:
+    QDARKSTYLE_AVAILABLE = False
+
+from .alcdef import convert_alcdef_archive
+from .cache import ConversionCache, first_obs_time
+from .core import (
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    OUTPUT_FORMATS,
+    ConversionCancelled,
+    build_suggested_filename,
+    concat_columns,
+    convert_columns,
+    detect_input_format,
+    iter_column_chunks,
+    output_context,
+    write_output,
+)
+from .profiling import NULL_PROFILER, StageProfiler
+
+LOG_FLUSH_INTERVAL = 0.25
+MAX_LOGGED_WARNINGS = 200
+
+
+def create_white_info_label() -> QtWidgets.QLabel:
+    text = (
+        "Convertitore in formato ADES. Importa i file da Tycho o CANOPUS. "
+        "Software scritto da Antonino Brosio (ABObservatory L90)."
+    )
+    lbl = QtWidgets.QLabel(text)
+    lbl.setWordWrap(True)
+    lbl.setAlignment(QtCore.Qt.AlignCenter)
+    try:
+        db = QtGui.QFontDatabase()
+        preferred = ["Calibri", "Segoe UI", "Arial", "Helvetica", "DejaVu Sans"]
+        family = next((f for f in preferred if f in db.families()), lbl.font().family())
+    except Exception:
+        family = "Calibri"
+    font = QtGui.QFont(family, 11)
+    font.setWeight(QtGui.QFont.DemiBold)
+    lbl.setFont(font)
+    lbl.setStyleSheet("QLabel { color: white; font-weight: 2; font-size: 10pt; }")
+    return lbl
+
+
+class FileDropLineEdit(QtWidgets.QLineEdit):
+    fileDropped = QtCore.pyqtSignal(str)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.setAcceptDrops(True)
+        self.setReadOnly(True)
+        self.setFocusPolicy(QtCore.Qt.NoFocus)
+        self.setCursor(QtGui.QCursor(QtCore.Qt.ArrowCursor))
+
+    def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
+        md = event.mimeData()
+        if md.hasUrls():
+            for url in md.urls():
+                if url.isLocalFile():
+                    event.acceptProposedAction()
+                    return
+        elif md.hasText():
+            event.acceptProposedAction()
+            return
+        event.ignore()
+
+    def dropEvent(self, event: QtGui.QDropEvent):
+        md = event.mimeData()
+        path = None
+        if md.hasUrls():
+            for url in md.urls():
+                if url.isLocalFile():
+                    path = url.toLocalFile()
+                    break
+        elif md.hasText():
+            txt = md.text().strip()
+            if os.path.exists(txt):
+                path = txt
+        if path and os.path.exists(path):
+            self.setText(path)
+            try:
+                self.fileDropped.emit(path)
+            except Exception:
+                pass
+            event.acceptProposedAction()
+        else:
+            event.ignore()
+
+
+class ConvertWorker(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int, int)
+    logged = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        path: str,
+        date_dec: int,
+        mag_dec: int,
+        err_dec: int,
+        cache: Optional[ConversionCache] = None,
+        profiler: Optional[StageProfiler] = None,
+    ):
+        super().__init__()
+        self.path = path
+        self.cache = cache
+        self.profiler = profiler or NULL_PROFILER
+        self.date_dec = date_dec
+        self.mag_dec = mag_dec
+        self.err_dec = err_dec
+        self._stop = threading.Event()
+        self._pending: List[str] = []
+        self._last_flush = 0.0
+        self._last_percent = -1
+        self._n_warnings = 0
+
+    def cancel(self):
+        self._stop.set()
+
+    def is_cancelled(self) -> bool:
+        return self._stop.is_set()
+
+    def _log(self, msg: str, force: bool = False):
+        if msg:
+            self._pending.append(msg)
+        now = time.monotonic()
+        if self._pending and (force or now - self._last_flush >= LOG_FLUSH_INTERVAL):
+            self.logged.emit("\n".join(self._pending))
+            self._pending = []
+            self._last_flush = now
+
+    def _warn(self, msg: str):
+        self._n_warnings += 1
+        if self._n_warnings <= MAX_LOGGED_WARNINGS:
+            self._log(msg)
+
+    def _progress(self, done: int, total: int):
+        percent = int(done * 100 / total) if total else 100
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.progress.emit(done, total)
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            self.progress.emit(0, 0)
+            prof = self.profiler
+            with prof.stage("detect"):
+                fmt, detect_seconds = detect_input_format(self.path)
+            self._log(f"Formato rilevato: {fmt.name} ({detect_seconds * 1000:.1f} ms)", force=True)
+            cache_key = None
+            if self.cache is not None:
+                try:
+                    with prof.stage("cache"):
+                        cache_key = self.cache.key(self.path, self.date_dec, self.mag_dec, self.err_dec, fmt.name)
+                        hit = self.cache.get(cache_key)
+                except Exception as e:
+                    self._log(f"[WARN] Cache non disponibile: {e}")
+                    hit = None
+                if hit is not None:
+                    n_rows, lines = hit
+                    self._log(f"Righe valide: {n_rows} (dalla cache)", force=True)
+                    self.finished.emit((first_obs_time(lines), lines))
+                    return
+            chunks = []
+            n_rows = 0
+            with prof.stage("read") as st:
+                for cols in iter_column_chunks(self.path, fmt=fmt):
+                    if self.is_cancelled():
+                        raise ConversionCancelled()
+                    chunks.append(cols)
+                    n_rows += cols.n_rows
+                cols = concat_columns(chunks)
+                st.rows = n_rows
+            chunks = []
+            if not cols.n_rows:
+                self._log("", force=True)
+                self.finished.emit(None)
+                return
+            self._log(f"Righe valide: {n_rows}", force=True)
+            obs_times, lines = convert_columns(
+                cols,
+                self.date_dec,
+                self.mag_dec,
+                self.err_dec,
+                on_warn=self._warn,
+                on_progress=self._progress,
+                should_stop=self.is_cancelled,
+                profiler=prof,
+            )
+            if self._n_warnings > MAX_LOGGED_WARNINGS:
+                self._log(f"[WARN] Altri {self._n_warnings - MAX_LOGGED_WARNINGS} JD non convertibili non mostrati.")
+            if cache_key is not None and obs_times:
+                try:
+                    with prof.stage("cache"):
+                        self.cache.put(cache_key, n_rows, lines)
+                except Exception as e:
+                    self._log(f"[WARN] Impossibile salvare in cache: {e}")
+            self._log("", force=True)
+            self.finished.emit((obs_times, lines))
+        except ConversionCancelled:
+            self._log("", force=True)
+            self.cancelled.emit()
+        except Exception as e:
+            self._log("", force=True)
+            self.failed.emit(str(e))
+
+
+class SplitWorker(QtCore.QObject):
+    progress = QtCore.pyqtSignal(int, int)
+    logged = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+    def __init__(
+        self, path: str, out_dir: str, mpc: str, obj: str, filt: str, date_dec: int, mag_dec: int, err_dec: int
+    ):
+        super().__init__()
+        self.path = path
+        self.out_dir = out_dir
+        self.kwargs = dict(mpc=mpc, obj=obj, filt=filt, date_dec=date_dec, mag_dec=mag_dec, err_dec=err_dec)
+        self._stop = threading.Event()
+
+    def cancel(self):
+        self._stop.set()
+
+    @QtCore.pyqtSlot()
+    def run(self):
+        try:
+            self.progress.emit(0, 0)
+            results = convert_alcdef_archive(
+                self.path,
+                out_dir=self.out_dir,
+                on_progress=self.progress.emit,
+                should_stop=self._stop.is_set,
+                **self.kwargs,
+            )
+            self.finished.emit(results)
+        except ConversionCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class ConverterWindow(QtWidgets.QWidget):
+    DEFAULT_DATE_DEC = DEFAULT_DATE_DEC
+    DEFAULT_MAG_DEC = DEFAULT_MAG_DEC
+    DEFAULT_ERR_DEC = DEFAULT_ERR_DEC
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("ADES Converter")
+        self.setAcceptDrops(True)
+        self.resize(800, 480)
+        self.lock_current_size()
+        self.settings = QtCore.QSettings("ABProject Space", "ADES Converter")
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        ico = os.path.join(base_dir, "icon.ico")
+        if os.path.exists(ico):
+            try:
+                self.setWindowIcon(QtGui.QIcon(ico))
+            except Exception:
+                pass
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setSpacing(6)
+        layout.setContentsMargins(8, 8, 8, 8)
+        path_row = QtWidgets.QHBoxLayout()
+        path_row.setSpacing(6)
+        self.path_edit = FileDropLineEdit()
+        self.path_edit.setPlaceholderText("Apri o trascina il file da convertire")
+        self.path_edit.fileDropped.connect(lambda p: self.log_msg(f"File trascinato: {p}"))
+        browse_btn = QtWidgets.QPushButton("Apri File")
+        browse_btn.clicked.connect(self.on_browse)
+        path_row.addWidget(self.path_edit, 1)
+        path_row.addWidget(browse_btn, 0)
+        compact_row = QtWidgets.QHBoxLayout()
+        compact_row.setSpacing(12)
+        left_col = QtWidgets.QVBoxLayout()
+        left_col.setSpacing(6)
+        left_form = QtWidgets.QFormLayout()
+        left_form.setSpacing(6)
+        self.mpc_edit = QtWidgets.QLineEdit()
+        self.obj_edit = QtWidgets.QLineEdit()
+        self.filt_edit = QtWidgets.QLineEdit()
+        self.mpc_edit.setPlaceholderText("es. L90")
+        self.obj_edit.setPlaceholderText("es. 2025 FA22")
+        self.filt_edit.setPlaceholderText("es. CLEAR")
+        left_form.addRow("Codice MPC:", self.mpc_edit)
+        left_form.addRow("Oggetto Osservato:", self.obj_edit)
+        left_form.addRow("Filtro Utilizzato:", self.filt_edit)
+        self.mpc_edit.setText(self.settings.value("mpc_code", "", type=str))
+        self.obj_edit.setText(self.settings.value("object_name", "", type=str))
+        self.filt_edit.setText(self.settings.value("filter_used", "", type=str))
+        self.info_label = create_white_info_label()
+        buttons_row = QtWidgets.QHBoxLayout()
+        buttons_row.setSpacing(30)
+        buttons_row.setAlignment(QtCore.Qt.AlignCenter)
+        self.reset_btn = QtWidgets.QPushButton("Ripristina")
+        self.convert_btn = QtWidgets.QPushButton("Converti")
+        self.clear_cache_btn = QtWidgets.QPushButton("Svuota cache")
+        for btn in (self.reset_btn, self.convert_btn, self.clear_cache_btn):
+            btn.setMinimumHeight(34)
+            btn.setStyleSheet("QPushButton { padding: 6px 14px; font-weight: 600; }")
+        self.reset_btn.clicked.connect(self.on_reset)
+        self.convert_btn.clicked.connect(self.on_convert)
+        self.clear_cache_btn.clicked.connect(self.on_clear_cache)
+        buttons_row.addWidget(self.reset_btn)
+        buttons_row.addWidget(self.convert_btn)
+        buttons_row.addWidget(self.clear_cache_btn)
+        left_col.addLayout(left_form)
+        left_col.addWidget(self.info_label)
+        left_col.addLayout(buttons_row)
+        right_group = QtWidgets.QGroupBox("Decimali")
+        rg_layout = QtWidgets.QGridLayout(right_group)
+        rg_layout.setHorizontalSpacing(8)
+        rg_layout.setVerticalSpacing(6)
+        self.dec_date_spin = QtWidgets.QSpinBox()
+        self.dec_date_spin.setRange(0, 9)
+        self.dec_date_spin.setValue(self.DEFAULT_DATE_DEC)
+        self.dec_mag_spin = QtWidgets.QSpinBox()
+        self.dec_mag_spin.setRange(0, 6)
+        self.dec_mag_spin.setValue(self.DEFAULT_MAG_DEC)
+        self.dec_err_spin = QtWidgets.QSpinBox()
+        self.dec_err_spin.setRange(0, 6)
+        self.dec_err_spin.setValue(self.DEFAULT_ERR_DEC)
+        self.split_check = QtWidgets.QCheckBox("Un file per blocco ALCDEF")
+        self.split_check.setToolTip(
+            "Converte ogni blocco STARTMETADATA in un file separato, con MPC, oggetto e filtro presi dai metadati."
+        )
+        self.split_check.setChecked(self.settings.value("split_alcdef", False, type=bool))
+        self.profile_check = QtWidgets.QCheckBox("Tempi per fase nel log")
+        self.profile_check.setToolTip("Registra durata e righe/s di ogni fase della conversione.")
+        self.profile_check.setChecked(self.settings.value("profile_stages", False, type=bool))
+        self.profile_mem_check = QtWidgets.QCheckBox("Picco di memoria (più lento)")
+        self.profile_mem_check.setToolTip("Misura anche il picco di memoria per fase con tracemalloc.")
+        self.profile_mem_check.setChecked(self.settings.value("profile_memory", False, type=bool))
+        self.profile_mem_check.setEnabled(self.profile_check.isChecked())
+        self.profile_check.toggled.connect(self.profile_mem_check.setEnabled)
+        rg_layout.addWidget(QtWidgets.QLabel("Data (s):"), 0, 0)
+        rg_layout.addWidget(self.dec_date_spin, 0, 1)
+        rg_layout.addWidget(QtWidgets.QLabel("Magnitudine:"), 1, 0)
+        rg_layout.addWidget(self.dec_mag_spin, 1, 1)
+        rg_layout.addWidget(QtWidgets.QLabel("Errore:"), 2, 0)
+        rg_layout.addWidget(self.dec_err_spin, 2, 1)
+        right_col = QtWidgets.QVBoxLayout()
+        right_col.setSpacing(6)
+        right_col.addWidget(right_group)
+        right_col.addWidget(self.split_check)
+        right_col.addWidget(self.profile_check)
+        right_col.addWidget(self.profile_mem_check)
+        compact_row.addLayout(left_col, 2)
+        compact_row.addLayout(right_col, 1)
+        self.log = QtWidgets.QPlainTextEdit()
+        self.log.setReadOnly(True)
+        self.log.setPlaceholderText("Log di conversione…")
+        self.log.setMaximumHeight(140)
+        self.progress_bar = QtWidgets.QProgressBar()
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.setVisible(False)
+        layout.addLayout(path_row)
+        layout.addLayout(compact_row)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.log)
+        self.cache = ConversionCache()
+        self._thread: Optional[QtCore.QThread] = None
+        self._worker: Optional[ConvertWorker] = None
+        self._job: Optional[dict] = None
+
+    def dragEnterEvent(self, event: QtGui.QDragEnterEvent):
+        md = event.mimeData()
+        if md.hasUrls():
+            for url in md.urls():
+                if url.isLocalFile():
+                    event.acceptProposedAction()
+                    return
+        event.ignore()
+
+    def dropEvent(self, event: QtGui.QDropEvent):
+        md = event.mimeData()
+        if not md.hasUrls():
+            event.ignore()
+            return
+        for url in md.urls():
+            if url.isLocalFile():
+                path = url.toLocalFile()
+                if os.path.exists(path):
+                    self.path_edit.setText(path)
+                    try:
+                        self.log_msg(f"File trascinato: {path}")
+                    except Exception:
+                        pass
+                    event.acceptProposedAction()
+                    return
+        event.ignore()
+
+    def log_msg(self, msg: str):
+        self.log.appendPlainText(msg)
+
+    def lock_current_size(self):
+        self.repaint()
+        size = self.size()
+        self.setMinimumSize(size)
+        self.setMaximumSize(size)
+
+    def on_browse(self):
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            "Seleziona file (CSV/TXT/DAT)",
+            "",
+            "CSV/TXT/DAT (*.csv *.txt *.dat);;Tutti i file (*.*)",
+        )
+        if path:
+            self.path_edit.setText(path)
+
+    def _build_suggested_filename(self, obs_times: List[str], n_obs: int) -> str:
+        return build_suggested_filename(
+            obs_times, n_obs, self.mpc_edit.text(), self.obj_edit.text(), self.filt_edit.text()
+        )
+
+    def on_reset(self):
+        self.mpc_edit.clear()
+        self.obj_edit.clear()
+        self.filt_edit.clear()
+        self.dec_date_spin.setValue(self.DEFAULT_DATE_DEC)
+        self.dec_mag_spin.setValue(self.DEFAULT_MAG_DEC)
+        self.dec_err_spin.setValue(self.DEFAULT_ERR_DEC)
+        self.settings.setValue("mpc_code", "")
+        self.settings.setValue("object_name", "")
+        self.settings.setValue("filter_used", "")
+        self.log_msg("Valori ripristinati ai predefiniti.")
+
+    def on_clear_cache(self):
+        _, n_bytes = self.cache.stats()
+        removed = self.cache.clear()
+        self.log_msg(f"Cache svuotata: {removed} voci rimosse ({n_bytes / 1024 / 1024:.1f} MB).")
+
+    def on_convert(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self.convert_btn.setEnabled(False)
+            self.log_msg("Annullamento in corso…")
+            return
+        path = self.path_edit.text().strip()
+        if not path or not os.path.exists(path):
+            QtWidgets.QMessageBox.warning(self, "Attenzione", "Seleziona un file valido (CSV/TXT/DAT).")
+            return
+        self.settings.setValue("mpc_code", self.mpc_edit.text())
+        self.settings.setValue("object_name", self.obj_edit.text())
+        self.settings.setValue("filter_used", self.filt_edit.text())
+        self.settings.setValue("split_alcdef", self.split_check.isChecked())
+        self.settings.setValue("profile_stages", self.profile_check.isChecked())
+        self.settings.setValue("profile_memory", self.profile_mem_check.isChecked())
+        self.log.clear()
+        self.log_msg(f"File sorgente: {path}")
+        if self.profile_check.isChecked():
+            profiler = StageProfiler(memory=self.profile_mem_check.isChecked())
+        else:
+            profiler = NULL_PROFILER
+        profiler.start()
+        self._job = {"path": path, "t0": time.perf_counter(), "profiler": profiler}
+        if self.split_check.isChecked() and detect_input_format(path)[0].name == "ALCDEF":
+            out_dir = QtWidgets.QFileDialog.getExistingDirectory(
+                self, "Cartella per i file ADES dei blocchi", os.path.dirname(path)
+            )
+            if not out_dir:
+                profiler.stop()
+                self.log_msg("Conversione annullata.")
+                return
+            worker = SplitWorker(
+                path,
+                out_dir,
+                self.mpc_edit.text(),
+                self.obj_edit.text(),
+                self.filt_edit.text(),
+                int(self.dec_date_spin.value()),
+                int(self.dec_mag_spin.value()),
+                int(self.dec_err_spin.value()),
+            )
+            self._job["out_dir"] = out_dir
+            self._start_worker(worker, self._on_split_finished)
+            return
+        worker = ConvertWorker(
+            path,
+            int(self.dec_date_spin.value()),
+            int(self.dec_mag_spin.value()),
+            int(self.dec_err_spin.value()),
+            cache=self.cache,
+            profiler=profiler,
+        )
+        self._start_worker(worker, self._on_worker_finished)
+
+    def _start_worker(self, worker: QtCore.QObject, on_finished):
+        self._worker = worker
+        self._thread = QtCore.QThread(self)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.progress.connect(self._on_worker_progress)
+        self._worker.logged.connect(self.log_msg)
+        self._worker.finished.connect(on_finished)
+        self._worker.failed.connect(self._on_worker_failed)
+        self._worker.cancelled.connect(self._on_worker_cancelled)
+        self._set_busy(True)
+        self._thread.start()
+
+    def _set_busy(self, busy: bool):
+        self.convert_btn.setText("Annulla" if busy else "Converti")
+        self.convert_btn.setEnabled(True)
+        self.reset_btn.setEnabled(not busy)
+        self.clear_cache_btn.setEnabled(not busy)
+        self.progress_bar.setVisible(busy)
+        if busy:
+            self.progress_bar.setRange(0, 0)
+
+    def _stop_worker(self):
+        if self._thread is not None:
+            self._thread.quit()
+            self._thread.wait()
+            self._thread.deleteLater()
+        if self._worker is not None:
+            self._worker.deleteLater()
+        self._thread = None
+        self._worker = None
+        self._set_busy(False)
+
+    def _end_profile(self, report: bool):
+        profiler = self._job["profiler"]
+        profiler.stop()
+        if report:
+            for line in profiler.report():
+                self.log_msg(line)
+
+    def _on_worker_progress(self, done: int, total: int):
+        if total <= 0:
+            self.progress_bar.setRange(0, 0)
+            return
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(int(done * 100 / total))
+
+    def _on_worker_cancelled(self):
+        self._stop_worker()
+        self._end_profile(report=False)
+        self.log_msg("Conversione annullata.")
+
+    def _on_worker_failed(self, err: str):
+        self._stop_worker()
+        self._end_profile(report=False)
+        QtWidgets.QMessageBox.critical(self, "Errore", err)
+        self.log_msg(f"[ERROR] {err}")
+
+    def _on_worker_finished(self, result):
+        self._stop_worker()
+        try:
+            self._save_result(result)
+        finally:
+            self._end_profile(report=True)
+
+    def _on_split_finished(self, results):
+        self._stop_worker()
+        self._end_profile(report=False)
+        n_ok = 0
+        for r in results:
+            if r["out_path"]:
+                n_ok += 1
+                self.log_msg(f"Blocco {r['block']}: {os.path.basename(r['out_path'])} ({r['n_obs']} oss.)")
+            else:
+                self.log_msg(f"Blocco {r['block']}: [ERROR] {r['error']}")
+        QtWidgets.QMessageBox.information(
+            self, "Fatto", f"Blocchi convertiti: {n_ok}/{len(results)}.\nCartella: {self._job['out_dir']}"
+        )
+
+    def _save_result(self, result):
+        path = self._job["path"]
+        if result is None:
+            QtWidgets.QMessageBox.warning(self, "Nessun dato", "Nessuna riga valida trovata (JD, Mag, MagErr).")
+            return
+        obs_times, lines = result
+        if not obs_times:
+            QtWidgets.QMessageBox.warning(self, "Errore", "Tutte le conversioni JD sono fallite.")
+            return
+        try:
+            n_obs = len(lines) - 1
+            suggested_name = self._build_suggested_filename(obs_times, n_obs) + ".txt"
+            out_path_default = os.path.join(os.path.dirname(path), suggested_name)
+            out_path, _ = QtWidgets.QFileDialog.getSaveFileName(
+                self,
+                "Salva in formato ADES",
+                out_path_default,
+                "Testo (*.txt);;ADES PSV (*.psv);;ADES XML (*.xml);;Tutti i file (*.*)",
+            )
+            if not out_path:
+                self.log_msg("Salvataggio annullato.")
+                return
+            ext = os.path.splitext(out_path)[1].lower()
+            out_format = next((f.name for f in OUTPUT_FORMATS.values() if f.extension == ext), "txt")
+            context = output_context(
+                self.mpc_edit.text(), self.obj_edit.text(), self.filt_edit.text(), int(self.dec_date_spin.value())
+            )
+            with self._job["profiler"].stage("write", n_obs):
+                write_output(out_path, lines, out_format, context)
+            self.log_msg(f"Salvato: {out_path}")
+            QtWidgets.QMessageBox.information(self, "Fatto", f"Conversione completata.\nFile: {out_path}")
+        except Exception as e:
+            QtWidgets.QMessageBox.critical(self, "Errore", str(e))
+            self.log_msg(f"[ERROR] {e}")
+
+    def closeEvent(self, event: QtGui.QCloseEvent):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._stop_worker()
+            self._end_profile(report=False)
+        super().closeEvent(event)
+
+
+def main():
+    app = QtWidgets.QApplication(sys.argv)
+    if QDARKSTYLE_AVAILABLE:
+        try:
+            app.setStyleSheet(qdarkstyle.load_stylesheet_pyqt5())
+        except Exception:
+            pass
+    w = ConverterWindow()
+    w.show()
+    sys.exit(app.exec_())
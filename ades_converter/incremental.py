@@ -0,0 +1,211 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .core import (
+    ADES_TEXT_HEADER,
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    Record,
+    build_suggested_filename,
+    columns_from_records,
+    convert_columns_to_isot,
+    convert_file,
+    detect_input_format,
+    format_line,
+    format_mag_err,
+    new_result,
+    parse_alcdef_line,
+    parse_tycho_line,
+    place_outputs,
+)
+from .watch import load_state, save_state
+
+INCREMENTAL_PARSERS: Dict[str, Callable[[str], Optional[Record]]] = {
+    "ALCDEF": parse_alcdef_line,
+    "Tycho Fotometry": parse_tycho_line,
+}
+INCREMENTAL_STATE_DIR = ".ades_incremental"
+PREFIX_CHECK_BYTES = 4096
+
+
+def incremental_state_path(out_dir: str, path: str) -> str:
+    key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(out_dir, INCREMENTAL_STATE_DIR, key + ".json")
+
+
+def prefix_digest(path: str, length: int) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+def read_tail(path: str, offset: int) -> Tuple[List[str], str, int]:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    cut = data.rfind(b"\n") + 1
+    complete = data[:cut].decode("utf-8", errors="replace").splitlines()
+    partial = data[cut:].decode("utf-8", errors="replace")
+    return complete, partial, offset + cut
+
+
+def _convert_records(
+    records: List[Record], date_dec: int, mag_dec: int, err_dec: int, warnings: List[str]
+) -> Tuple[List[str], List[str], List[str], Optional[float]]:
+    if not records:
+        return [], [], [], None
+    cols = columns_from_records(records)
+    obs_times, cols = convert_columns_to_isot(cols, date_dec, on_warn=warnings.append)
+    if not obs_times:
+        return [], [], [], None
+    mags_fmt, errs_fmt = format_mag_err(cols, mag_dec, err_dec)
+    return obs_times, mags_fmt, errs_fmt, float(cols.jd[-1])
+
+
+def _relayout(out_path: str, w_mag: int, w_err: int):
+    with open(out_path, "r", encoding="utf-8") as f:
+        old = f.read().splitlines()
+    lines = [ADES_TEXT_HEADER]
+    for ln in old[1:]:
+        t, m, e = ln.split()
+        lines.append(format_line(t, m, e, w_mag, w_err))
+    fd, tmp_path = tempfile.mkstemp(prefix=".ades_", suffix=".tmp", dir=os.path.dirname(out_path))
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+        f.write("\n".join(lines) + "\n")
+    shutil.copymode(out_path, tmp_path)
+    os.replace(tmp_path, out_path)
+
+
+def convert_file_incremental(
+    path: str,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    out_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    fmt, detect_seconds = detect_input_format(path)
+    parser = INCREMENTAL_PARSERS.get(fmt.name)
+    if parser is None:
+        result = convert_file(path, mpc, obj, filt, date_dec, mag_dec, err_dec, out_dir)
+        result["mode"] = "full"
+        return result
+    result = new_result(path)
+    result["format"] = fmt.name
+    result["detect_seconds"] = detect_seconds
+    warnings: List[str] = result["warnings"]
+    try:
+        out_dir = out_dir or os.path.dirname(os.path.abspath(path))
+        state_path = incremental_state_path(out_dir, path)
+        params = [mpc, obj, filt, date_dec, mag_dec, err_dec]
+        size = os.path.getsize(path)
+        entry = load_state(state_path)
+        out_path = prev_out_path = entry.get("out_path")
+        append = (
+            entry.get("params") == params
+            and entry.get("format") == fmt.name
+            and entry.get("offset", 0) <= size
+            and out_path
+            and os.path.exists(out_path)
+            and prefix_digest(path, entry.get("prefix_len", 0)) == entry.get("prefix")
+        )
+        if not append:
+            if out_path and os.path.exists(out_path):
+                os.remove(out_path)
+            entry = {
+                "params": params,
+                "format": fmt.name,
+                "offset": 0,
+                "n_rows": 0,
+                "n_obs": 0,
+                "tail_rows": 0,
+                "tail_obs": 0,
+                "tail_bytes": 0,
+                "w_mag": 3,
+                "w_err": 3,
+                "first_time": None,
+                "last_jd": None,
+                "out_path": None,
+            }
+            out_path = None
+        result["mode"] = "append" if append else "full"
+
+        lines, partial, new_offset = read_tail(path, entry["offset"])
+        records = [r for r in map(parser, lines) if r is not None]
+        partial_rec = parser(partial) if partial.strip() else None
+        times, mags_fmt, errs_fmt, last_jd = _convert_records(records, date_dec, mag_dec, err_dec, warnings)
+        p_times, p_mags, p_errs, p_last_jd = _convert_records(
+            [partial_rec] if partial_rec is not None else [], date_dec, mag_dec, err_dec, warnings
+        )
+        times += p_times
+        mags_fmt += p_mags
+        errs_fmt += p_errs
+
+        n_rows = entry["n_rows"] - entry["tail_rows"] + len(records) + (partial_rec is not None)
+        n_obs = entry["n_obs"] - entry["tail_obs"] + len(times)
+        result["rows"] = n_rows
+        result["new_rows"] = len(records) + (partial_rec is not None) - entry["tail_rows"]
+        first_time = entry["first_time"] or (times[0] if times else None)
+        if first_time is None:
+            result["error"] = "Nessuna riga valida trovata (JD, Mag, MagErr)." if not n_rows else "Tutte le conversioni JD sono fallite."
+            return result
+
+        w_mag = max([entry["w_mag"]] + [len(m) for m in mags_fmt])
+        w_err = max([entry["w_err"]] + [len(e) for e in errs_fmt])
+        new_lines = [format_line(t, m, e, w_mag, w_err) + "\n" for t, m, e in zip(times, mags_fmt, errs_fmt)]
+        tail_bytes = len(new_lines[-1].encode("utf-8")) if p_times else 0
+        if out_path is None:
+            out_path = os.path.join(out_dir, ".ades_incremental_" + os.path.basename(path) + ".tmp")
+            with open(out_path, "w", encoding="utf-8", newline="\n") as f:
+                f.write(ADES_TEXT_HEADER + "\n")
+                f.writelines(new_lines)
+        else:
+            if entry["tail_bytes"]:
+                with open(out_path, "r+b") as f:
+                    f.truncate(os.path.getsize(out_path) - entry["tail_bytes"])
+            if (w_mag, w_err) != (entry["w_mag"], entry["w_err"]):
+                _relayout(out_path, w_mag, w_err)
+            with open(out_path, "a", encoding="utf-8", newline="\n") as f:
+                f.writelines(new_lines)
+
+        final_name = build_suggested_filename([first_time], n_obs, mpc, obj, filt) + ".txt"
+        final_path = os.path.join(out_dir, final_name)
+        if final_path != out_path:
+            # un file con lo stesso nome prodotto da un'altra sorgente non va sovrascritto: riceve _2, _3, ...
+            owned = {os.path.abspath(p) for p in (out_path, prev_out_path) if p}
+            taken = {os.path.abspath(os.path.join(out_dir, n)) for n in os.listdir(out_dir)} - owned
+            placed = {"tmp_path": out_path, "out_name": final_name}
+            place_outputs([placed], taken)
+            final_path = placed["out_path"]
+        prefix_len = min(size, PREFIX_CHECK_BYTES)
+        entry.update(
+            offset=new_offset,
+            n_rows=n_rows,
+            n_obs=n_obs,
+            tail_rows=int(partial_rec is not None),
+            tail_obs=len(p_times),
+            tail_bytes=tail_bytes,
+            w_mag=w_mag,
+            w_err=w_err,
+            first_time=first_time,
+            last_jd=p_last_jd if p_last_jd is not None else (last_jd if last_jd is not None else entry["last_jd"]),
+            out_path=final_path,
+            prefix_len=prefix_len,
+            prefix=prefix_digest(path, prefix_len),
+        )
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        save_state(state_path, entry)
+        result["n_obs"] = n_obs
+        result["out_path"] = final_path
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        result["seconds"] = time.perf_counter() - t0
+    return result
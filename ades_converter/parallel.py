@@ -0,0 +1,139 @@
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+from .core import (
+    InputFormat,
+    ObsColumns,
+    columns_from_records,
+    concat_columns,
+    csv_header_indices,
+    csv_is_blank_or_comment,
+    detect_input_format,
+    is_tycho_header,
+    read_any_columns,
+    scan_csv_rows,
+    scan_tycho_lines,
+    sniff_delimiter_from_handle,
+)
+
+PARALLEL_FORMATS = ("CSV", "Tycho Fotometry")
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+PARALLEL_MIN_CHUNK_BYTES = 2 * 1024 * 1024
+PARALLEL_CHUNKS_PER_JOB = 4
+LAYOUT_MAX_LINES = 1000
+
+
+class ChunkLayout(NamedTuple):
+    format: str
+    data_start: int
+    delimiter: str = ""
+    indices: Tuple[int, int, int] = (0, 1, 2)
+
+
+def _decode_lines(data: bytes) -> io.TextIOWrapper:
+    return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors="replace")
+
+
+def detect_layout(path: str, fmt: InputFormat) -> Optional[ChunkLayout]:
+    # intestazione e delimitatore letti una sola volta; None = file da leggere in serie
+    if fmt.name == "CSV":
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            delimiter = sniff_delimiter_from_handle(f)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if fmt.name == "CSV" and mm.find(b'"') >= 0:
+                return None  # campi tra virgolette possono contenere a capo
+            pos = 0
+            for _ in range(LAYOUT_MAX_LINES):
+                end = mm.find(b"\n", pos)
+                end = len(mm) if end < 0 else end + 1
+                line = mm[pos:end]
+                if b"\r" in line.rstrip(b"\r\n"):
+                    return None  # a capo solo CR: le righe non coincidono con i byte "\n"
+                text = next(iter(_decode_lines(line)), "")
+                if fmt.name != "CSV":
+                    return ChunkLayout(fmt.name, end if is_tycho_header(text) else pos)
+                raw = next(csv.reader([text], delimiter=delimiter), [])
+                if not csv_is_blank_or_comment(raw):
+                    indices = csv_header_indices(raw)
+                    if indices is None:
+                        return ChunkLayout(fmt.name, pos, delimiter)
+                    return ChunkLayout(fmt.name, end, delimiter, indices)
+                if end >= len(mm):
+                    break
+                pos = end
+    return None
+
+
+def split_offsets(path: str, start: int, n_chunks: int) -> List[Tuple[int, int]]:
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if start >= size:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            step = max(1, (size - start) // max(1, n_chunks))
+            bounds = []
+            while start < size:
+                end = mm.find(b"\n", min(start + step, size) - 1, size)
+                end = size if end < 0 else end + 1
+                bounds.append((start, end))
+                start = end
+            return bounds
+
+
+def _pack_texts(texts: Optional[List[str]]) -> Optional[str]:
+    # una stringa unica si serializza ~5 volte più in fretta di una lista di stringhe corte
+    return None if texts is None else "\n".join(texts)
+
+
+def _unpack_texts(packed: Optional[str], n_rows: int) -> Optional[List[str]]:
+    if packed is None:
+        return None
+    return packed.split("\n") if n_rows else []
+
+
+def parse_chunk(path: str, start: int, stop: int, layout: ChunkLayout, keep_text: bool = True) -> Tuple:
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = _decode_lines(f.read(stop - start))
+    if layout.format == "CSV":
+        records = scan_csv_rows(csv.reader(lines, delimiter=layout.delimiter), *layout.indices)
+    else:
+        records = scan_tycho_lines(lines)
+    cols = columns_from_records(records, keep_text)
+    return cols.jd, cols.mag, cols.err, _pack_texts(cols.mag_txt), _pack_texts(cols.err_txt)
+
+
+def read_columns_parallel(
+    path: str,
+    jobs: Optional[int] = None,
+    keep_text: bool = True,
+    fmt: Optional[InputFormat] = None,
+    min_bytes: int = PARALLEL_MIN_BYTES,
+) -> ObsColumns:
+    if fmt is None:
+        fmt, _ = detect_input_format(path)
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    size = os.path.getsize(path)
+    layout = None
+    if jobs > 1 and fmt.name in PARALLEL_FORMATS and size and size >= min_bytes:
+        layout = detect_layout(path, fmt)
+    if layout is None:
+        return read_any_columns(path, keep_text, fmt)
+    n_chunks = min(jobs * PARALLEL_CHUNKS_PER_JOB, max(1, size // PARALLEL_MIN_CHUNK_BYTES))
+    bounds = split_offsets(path, layout.data_start, n_chunks)
+    n = len(bounds)
+    if not n:
+        return columns_from_records([], keep_text)
+    with ProcessPoolExecutor(max_workers=min(jobs, n)) as ex:
+        chunks = ex.map(parse_chunk, [path] * n, [a for a, _ in bounds], [b for _, b in bounds], [layout] * n, [keep_text] * n)
+        return concat_columns(
+            [
+                ObsColumns(jd, mag, err, _unpack_texts(mag_txt, len(jd)), _unpack_texts(err_txt, len(jd)))
+                for jd, mag, err, mag_txt, err_txt in chunks
+            ]
+        )
@@ -0,0 +1,117 @@
+import cProfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "rows", "t0", "mem0")
+
+    def __init__(self, profiler: "StageProfiler", name: str, rows: int):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self) -> "_Stage":
+        if self.profiler.memory:
+            tracemalloc.reset_peak()
+            self.mem0 = tracemalloc.get_traced_memory()[0]
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        stage = self.profiler.stages.setdefault(self.name, {"seconds": 0.0, "rows": 0})
+        stage["seconds"] += seconds
+        stage["rows"] += self.rows
+        stage["rows_per_sec"] = stage["rows"] / stage["seconds"] if stage["seconds"] > 0 else 0.0
+        if self.profiler.memory:
+            peak = max(0, tracemalloc.get_traced_memory()[1] - self.mem0) / (1024 * 1024)
+            stage["peak_mb"] = max(stage.get("peak_mb", 0.0), peak)
+        return False
+
+
+class _NullStage:
+    __slots__ = ("rows",)
+
+    def __enter__(self) -> "_NullStage":
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class StageProfiler:
+    enabled = True
+
+    def __init__(self, memory: bool = False, cprofile_path: Optional[str] = None):
+        self.memory = memory
+        self.cprofile_path = cprofile_path
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._own_tracemalloc = False
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracemalloc = True
+        if self.cprofile_path:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self):
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.cprofile_path)
+            self._cprofile = None
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+            self._own_tracemalloc = False
+
+    def stage(self, name: str, rows: int = 0) -> _Stage:
+        return _Stage(self, name, rows)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: dict(stage) for name, stage in self.stages.items()}
+
+    def report(self) -> List[str]:
+        return format_stage_report(self.stages)
+
+
+class NullProfiler:
+    enabled = False
+    stages: Dict[str, Dict[str, float]] = {}
+    _stage = _NullStage()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def stage(self, name: str, rows: int = 0) -> _NullStage:
+        return self._stage
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        return {}
+
+    def report(self) -> List[str]:
+        return []
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def format_stage_report(stages: Dict[str, Dict[str, Any]]) -> List[str]:
+    lines = []
+    total = sum(s["seconds"] for s in stages.values())
+    for name, s in stages.items():
+        line = f"  {name:<7} {s['seconds'] * 1000:9.1f} ms"
+        if s.get("rows"):
+            line += f"  {s['rows_per_sec']:12,.0f} righe/s".replace(",", ".")
+        if "peak_mb" in s:
+            line += f"  picco {s['peak_mb']:.1f} MB"
+        lines.append(line)
+    if lines:
+        lines.insert(0, f"Tempi per fase (totale {total * 1000:.1f} ms):")
+    return lines
@@ -0,0 +1,356 @@
+import io
+import ipaddress
+import json
+import os
+import signal
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .core import (
+    DEFAULT_DATE_DEC,
+    DEFAULT_ERR_DEC,
+    DEFAULT_MAG_DEC,
+    OUTPUT_FORMATS,
+    build_suggested_filename,
+    convert_columns,
+    detect_input_format,
+    jd_array_to_isot_z,
+    new_result,
+    output_context,
+    read_any_columns,
+    render_output,
+)
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_QUEUE_SIZE = 32
+SERVER_TIMEOUT = 60.0
+SERVER_MAX_BYTES = 64 * 1024 * 1024
+SERVER_WARMUP_JD = 2460000.5
+METRICS_WINDOW = 1000
+CONTENT_TYPES = {"txt": "text/plain", "psv": "text/plain", "xml": "application/xml"}
+PARAM_RANGES = {"date_dec": (0, 9), "mag_dec": (0, 6), "err_dec": (0, 6)}
+
+
+def warm_worker():
+    # Ctrl+C arriva a tutto il gruppo di processi: lo gestisce solo il server, che chiude il pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # carica astropy (usato per i giorni con secondo intercalare) e la tabella ERFA una volta per processo
+    jd_array_to_isot_z([SERVER_WARMUP_JD], engine="astropy")
+    jd_array_to_isot_z([SERVER_WARMUP_JD])
+
+
+def worker_pid() -> int:
+    return os.getpid()
+
+
+def convert_content(
+    content: bytes,
+    mpc: str = "",
+    obj: str = "",
+    filt: str = "",
+    date_dec: int = DEFAULT_DATE_DEC,
+    mag_dec: int = DEFAULT_MAG_DEC,
+    err_dec: int = DEFAULT_ERR_DEC,
+    output_format: str = "txt",
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    result = new_result("")
+    result["started"] = time.time()
+    fd, tmp_path = tempfile.mkstemp(prefix=".ades_srv_", suffix=".txt")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        fmt, _ = detect_input_format(tmp_path)
+        result["format"] = fmt.name
+        cols = read_any_columns(tmp_path, fmt=fmt)
+        result["rows"] = cols.n_rows
+        if not cols.n_rows:
+            result["error"] = "Nessuna riga valida trovata (JD, Mag, MagErr)."
+            return result
+        obs_times, lines = convert_columns(cols, date_dec, mag_dec, err_dec, on_warn=result["warnings"].append)
+        if not obs_times:
+            result["error"] = "Tutte le conversioni JD sono fallite."
+            return result
+        n_obs = len(lines) - 1
+        out = io.StringIO()
+        render_output(out, lines, output_format, output_context(mpc, obj, filt, date_dec))
+        result["n_obs"] = n_obs
+        result["text"] = out.getvalue()
+        result["out_name"] = build_suggested_filename(obs_times, n_obs, mpc, obj, filt)
+        result["out_name"] += OUTPUT_FORMATS[output_format].extension
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+def parse_params(query: str) -> Dict[str, Any]:
+    raw = {k: v[-1] for k, v in parse_qs(query).items()}
+    params: Dict[str, Any] = {
+        "mpc": raw.get("mpc", ""),
+        "obj": raw.get("object", ""),
+        "filt": raw.get("filter", ""),
+        "output_format": raw.get("format", "txt"),
+    }
+    if params["output_format"] not in OUTPUT_FORMATS:
+        raise ValueError(f"Formato di output sconosciuto: {params['output_format']!r}.")
+    defaults = {"date_dec": DEFAULT_DATE_DEC, "mag_dec": DEFAULT_MAG_DEC, "err_dec": DEFAULT_ERR_DEC}
+    for name, default in defaults.items():
+        lo, hi = PARAM_RANGES[name]
+        try:
+            value = int(raw.get(name, default))
+        except ValueError:
+            raise ValueError(f"{name} deve essere un intero.") from None
+        if not lo <= value <= hi:
+            raise ValueError(f"{name} deve essere compreso tra {lo} e {hi}.")
+        params[name] = value
+    return params
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    values = sorted(values)
+    n = len(values)
+    return {
+        "p50": round(values[(n - 1) // 2], 3),
+        "p95": round(values[int(0.95 * (n - 1))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+class ServerMetrics:
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.pool_restarts = 0
+        self.in_flight = 0
+        self.rows = 0
+        self.timings: deque = deque(maxlen=window)
+
+    def record(self, queue_ms: float, convert_ms: float, total_ms: float, rows: int, ok: bool):
+        with self.lock:
+            self.requests += 1
+            self.rows += rows
+            if not ok:
+                self.errors += 1
+            self.timings.append((queue_ms, convert_ms, total_ms))
+
+    def count(self, name: str):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            timings = list(self.timings)
+            snap = {
+                "uptime_s": round(time.time() - self.started, 3),
+                "requests": self.requests,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "pool_restarts": self.pool_restarts,
+                "in_flight": self.in_flight,
+                "rows": self.rows,
+            }
+        for i, name in enumerate(("queue_ms", "convert_ms", "total_ms")):
+            snap[name] = _percentiles([t[i] for t in timings])
+        return snap
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    server_version = "ADESConverter/1"
+    protocol_version = "HTTP/1.1"
+    # intestazioni e corpo partono in due write: senza TCP_NODELAY il delayed ACK aggiunge ~40 ms a risposta
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args):
+        if self.server.log_requests:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send_pool_broken(self, pool: ProcessPoolExecutor):
+        # un processo è terminato in modo anomalo: il pool non accetta più lavori e va ricreato
+        self.server.replace_pool(pool)
+        self._send_json(503, {"error": "Processo di conversione terminato, riprovare."}, {"Retry-After": "1"})
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, {"status": "ok", "jobs": self.server.jobs})
+        elif path == "/stats":
+            self._send_json(200, self.server.metrics.snapshot())
+        else:
+            self._send_json(404, {"error": "Percorso sconosciuto."})
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        server = self.server
+        url = urlparse(self.path)
+        if url.path != "/convert":
+            self.close_connection = True
+            self._send_json(404, {"error": "Percorso sconosciuto."})
+            return
+        try:
+            params = parse_params(url.query)
+        except ValueError as e:
+            self.close_connection = True
+            self._send_json(400, {"error": str(e)})
+            return
+        length_header = self.headers.get("Content-Length", "")
+        if not length_header.isdigit():
+            self.close_connection = True
+            self._send_json(411, {"error": "Content-Length mancante o non valido."})
+            return
+        length = int(length_header)
+        if length > server.max_bytes:
+            self.close_connection = True
+            self._send_json(413, {"error": f"File troppo grande (massimo {server.max_bytes} byte)."})
+            return
+        content = self.rfile.read(length)
+        if not server.slots.acquire(blocking=False):
+            server.metrics.count("rejected")
+            self._send_json(503, {"error": "Coda piena, riprovare."}, {"Retry-After": "1"})
+            return
+        server.metrics.count("in_flight")
+        submitted = time.time()
+        pool = server.pool
+        try:
+            future = pool.submit(convert_content, content, **params)
+        except BrokenProcessPool:
+            server.release_slot()
+            self._send_pool_broken(pool)
+            return
+        except Exception:
+            server.release_slot()
+            raise
+        # il posto si libera solo quando il processo ha davvero finito, anche dopo un 504:
+        # cancel() non ferma una conversione già avviata
+        future.add_done_callback(lambda _: server.release_slot())
+        try:
+            result = future.result(timeout=server.request_timeout)
+        except FutureTimeout:
+            future.cancel()
+            server.metrics.count("timeouts")
+            self._send_json(504, {"error": "Tempo massimo di conversione superato."})
+            return
+        except BrokenProcessPool:
+            self._send_pool_broken(pool)
+            return
+        queue_ms = max(0.0, (result["started"] - submitted) * 1000)
+        convert_ms = result["seconds"] * 1000
+        total_ms = (time.perf_counter() - t0) * 1000
+        server.metrics.record(queue_ms, convert_ms, total_ms, result["rows"], result["error"] is None)
+        headers = {
+            "Server-Timing": f"queue;dur={queue_ms:.3f}, convert;dur={convert_ms:.3f}, total;dur={total_ms:.3f}",
+            "X-ADES-Format": result["format"] or "-",
+            "X-ADES-Rows": str(result["rows"]),
+            "X-ADES-Observations": str(result["n_obs"]),
+            "X-ADES-Warnings": str(len(result["warnings"])),
+        }
+        if result["error"]:
+            self._send_json(422, {"error": result["error"], "format": result["format"]}, headers)
+            return
+        headers["Content-Disposition"] = f'attachment; filename="{result["out_name"]}"'
+        content_type = CONTENT_TYPES.get(params["output_format"], "text/plain")
+        self._send(200, result["text"].encode("utf-8"), content_type, headers)
+
+
+class ConversionServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        jobs: Optional[int] = None,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        request_timeout: float = SERVER_TIMEOUT,
+        max_bytes: int = SERVER_MAX_BYTES,
+        log_requests: bool = False,
+    ):
+        if not is_loopback(host):
+            raise ValueError(f"Il server accetta solo indirizzi locali (127.0.0.1, ::1, localhost), non {host!r}.")
+        if ":" in host:
+            self.address_family = socket.AF_INET6
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.queue_size = max(0, queue_size)
+        self.request_timeout = request_timeout
+        self.max_bytes = max_bytes
+        self.log_requests = log_requests
+        self.metrics = ServerMetrics()
+        self.slots = threading.BoundedSemaphore(self.jobs + self.queue_size)
+        self.pool_lock = threading.Lock()
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=warm_worker)
+        try:
+            super().__init__((host, port), ConversionHandler)
+        except Exception:
+            self.pool.shutdown(cancel_futures=True)
+            raise
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://[{host}]:{port}" if ":" in host else f"http://{host}:{port}"
+
+    def warm_up(self) -> int:
+        # avvia subito tutti i processi, così la prima richiesta non paga l'import di astropy
+        for f in [self.pool.submit(worker_pid) for _ in range(self.jobs)]:
+            f.result()
+        return self.jobs
+
+    def replace_pool(self, broken: ProcessPoolExecutor):
+        with self.pool_lock:
+            if self.pool is not broken:
+                return
+            self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=warm_worker)
+            self.metrics.count("pool_restarts")
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def release_slot(self):
+        with self.metrics.lock:
+            self.metrics.in_flight -= 1
+        self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
@@ -0,0 +1,144 @@
+import datetime
+import random
+import warnings
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 1972-01-01: prima UTC aveva secondi di durata variabile, lasciati ad astropy
+UTC_FAST_FIRST_DAY = 2441318
+# jd + 0.5 < 2**22: la frazione del giorno resta esatta in float64, come in ERFA
+UTC_FAST_LAST_DAY = 2 ** 22 - 1
+# numero del giorno giuliano (floor(jd + 0.5)) meno ordinale gregoriano della stessa data
+JD_ORDINAL_OFFSET = 1721425
+SECONDS_PER_DAY = 86400
+
+
+def _digits(buf: np.ndarray, col: int, values: np.ndarray, n_digits: int):
+    for k in range(n_digits):
+        buf[:, col + n_digits - 1 - k] = values % 10 + 48
+        values = values // 10
+
+
+class UtcDayTable:
+    def __init__(self):
+        self.dates: Dict[int, bytes] = {}
+        self.tai_utc: Dict[int, float] = {}
+
+    def date(self, day: int) -> bytes:
+        d = self.dates.get(day)
+        if d is None:
+            d = datetime.date.fromordinal(day - JD_ORDINAL_OFFSET).isoformat().encode("ascii")
+            self.dates[day] = d
+        return d
+
+    def offset(self, day: int) -> float:
+        # TAI-UTC all'inizio del giorno, dalla stessa tabella dei secondi intercalari usata da astropy
+        dat = self.tai_utc.get(day)
+        if dat is None:
+            import erfa
+
+            y, m, d = (int(x) for x in self.date(day).split(b"-"))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                dat = float(erfa.dat(y, m, d, 0.0))
+            self.tai_utc[day] = dat
+        return dat
+
+    def is_regular(self, day: int) -> bool:
+        # giorno di 86400 s esatti: nessun secondo intercalare alla fine
+        return UTC_FAST_FIRST_DAY <= day <= UTC_FAST_LAST_DAY and self.offset(day) == self.offset(day + 1)
+
+    def format_isot_z(self, jds: np.ndarray, precision: int = 2) -> Tuple[np.ndarray, List[str]]:
+        # stessi passi di eraD2dtf/eraD2tf: frazione esatta, secondi * 10**precision, arrotondamento ERFA_DNINT
+        jds = np.asarray(jds, dtype=float)
+        x = jds + 0.5
+        with np.errstate(invalid="ignore"):
+            day_f = np.floor(x)
+            handled = (day_f >= UTC_FAST_FIRST_DAY) & (day_f <= UTC_FAST_LAST_DAY)
+        idx = np.flatnonzero(handled)
+        if not len(idx):
+            return handled, []
+        days = day_f[idx].astype(np.int64)
+        uniq, inv = np.unique(days, return_inverse=True)
+        regular = np.array([self.is_regular(int(d)) for d in uniq], dtype=bool)
+        if not regular.all():
+            keep = regular[inv]
+            handled[idx[~keep]] = False
+            idx, days = idx[keep], days[keep]
+            if not len(idx):
+                return handled, []
+        rs = 10 ** precision
+        a = float(rs) * (float(SECONDS_PER_DAY) * (x[idx] - day_f[idx]))
+        units = np.where(a < 0.5, 0.0, np.floor(a + 0.5)).astype(np.int64)
+        carry = units >= SECONDS_PER_DAY * rs
+        if carry.any():
+            # arrotondato a 24:00:00: mezzanotte del giorno dopo
+            units[carry] = 0
+            days = days + carry
+        uniq, inv = np.unique(days, return_inverse=True)
+        dates = np.frombuffer(b"".join(self.date(int(d)) for d in uniq), dtype=np.uint8).reshape(len(uniq), 10)
+        secs, frac = np.divmod(units, rs)
+        width = 20 + (precision + 1 if precision else 0)
+        buf = np.empty((len(idx), width), dtype=np.uint8)
+        buf[:, :10] = dates[inv]
+        buf[:, 10:19] = np.frombuffer(b"T00:00:00", dtype=np.uint8)
+        _digits(buf, 11, secs // 3600, 2)
+        _digits(buf, 14, secs // 60 % 60, 2)
+        _digits(buf, 17, secs % 60, 2)
+        if precision:
+            buf[:, 19] = ord(".")
+            _digits(buf, 20, frac, precision)
+        buf[:, -1] = ord("Z")
+        return handled, buf.view(f"S{width}").ravel().astype(f"U{width}").tolist()
+
+
+UTC_DAYS = UtcDayTable()
+
+
+def leap_second_days() -> List[int]:
+    import erfa
+
+    days = []
+    for y, m, _ in erfa.leap_seconds.get():
+        if y >= 1972:
+            days.append(datetime.date(int(y), int(m), 1).toordinal() + JD_ORDINAL_OFFSET - 1)
+    return days
+
+
+def cross_check_jd(
+    samples: int = 20000,
+    precisions: Sequence[int] = range(10),
+    seed: int = 0,
+    jd_min: float = 2436934.5,
+    jd_max: float = 2634166.5,
+) -> Tuple[int, List[Tuple[float, int, str, Optional[str]]]]:
+    # confronto con astropy: date a caso (1960-2500), bordi del giorno, giorni con secondo intercalare, quasi-pareggi
+    from .core import jd_array_to_isot_z
+
+    rnd = random.Random(seed)
+    edges = []
+    for day in leap_second_days() + [rnd.randint(UTC_FAST_FIRST_DAY, 2488070) for _ in range(200)]:
+        for base in (day - 0.5, day + 0.5):
+            below = above = base
+            edges.append(base)
+            for k in range(1, 4):
+                below, above = np.nextafter(below, -np.inf), np.nextafter(above, np.inf)
+                edges += [below, above, base - k * 1e-6 / SECONDS_PER_DAY, base + k * 1e-6 / SECONDS_PER_DAY]
+    checked = 0
+    mismatches: List[Tuple[float, int, str, Optional[str]]] = []
+    for precision in precisions:
+        step = 1.0 / (SECONDS_PER_DAY * 10 ** precision)
+        ties = [
+            rnd.randint(UTC_FAST_FIRST_DAY, 2488070) - 0.5 + (rnd.randrange(SECONDS_PER_DAY * 10 ** precision) + 0.5) * step
+            for _ in range(samples // 4)
+        ]
+        uniform = [rnd.uniform(jd_min, jd_max) for _ in range(samples)]
+        jds = np.array(uniform + ties + edges, dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            fast = jd_array_to_isot_z(jds, precision)
+            ref = jd_array_to_isot_z(jds, precision, engine="astropy")
+        checked += len(jds)
+        mismatches.extend((float(j), precision, r, f) for j, r, f in zip(jds, ref, fast) if r != f)
+    return checked, mismatches
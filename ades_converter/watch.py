@@ -0,0 +1,155 @@
+import fnmatch
+import inspect
+import json
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .core import convert_file, place_outputs
+
+WATCH_PATTERNS = ("*.txt", "*.csv", "*.dat")
+WATCH_INTERVAL = 0.25
+WATCH_STATE_NAME = ".ades_watch_state.json"
+WATCH_OUT_SUBDIR = "ades"
+
+
+def default_state_path(out_dir: str) -> str:
+    return os.path.join(out_dir, WATCH_STATE_NAME)
+
+
+def load_state(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_state(path: str, state: Dict[str, Dict[str, Any]]):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class FolderWatcher:
+    def __init__(
+        self,
+        directory: str,
+        out_dir: Optional[str] = None,
+        patterns: Sequence[str] = WATCH_PATTERNS,
+        state_path: Optional[str] = None,
+        convert: Callable[..., Dict[str, Any]] = convert_file,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **convert_kwargs,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.out_dir = os.path.abspath(out_dir or os.path.join(self.directory, WATCH_OUT_SUBDIR))
+        self.patterns = tuple(patterns)
+        self.state_path = state_path or default_state_path(self.out_dir)
+        self.convert = convert
+        self.on_result = on_result
+        self.convert_kwargs = convert_kwargs
+        # con i convertitori che lo supportano il nome definitivo si sceglie qui, evitando sovrascritture
+        self.defer_placement = "defer_placement" in inspect.signature(convert).parameters
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.state = load_state(self.state_path)
+        self._pending: Dict[str, Tuple[int, int]] = {}
+
+    def _matches(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name.lower(), p.lower()) for p in self.patterns)
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        try:
+            it = os.scandir(self.directory)
+        except OSError:
+            return found
+        with it:
+            for entry in it:
+                if entry.name.startswith(".") or not self._matches(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                found[entry.path] = (st.st_size, st.st_mtime_ns)
+        return found
+
+    def _is_done(self, path: str, sig: Tuple[int, int]) -> bool:
+        done = self.state.get(path)
+        return done is not None and (done.get("size"), done.get("mtime_ns")) == sig
+
+    def ready_files(self) -> List[str]:
+        ready = []
+        current = self.scan()
+        for path, sig in current.items():
+            if self._is_done(path, sig):
+                self._pending.pop(path, None)
+                continue
+            if self._pending.get(path) == sig:
+                ready.append(path)
+            else:
+                self._pending[path] = sig
+        for path in list(self._pending):
+            if path not in current:
+                del self._pending[path]
+        return sorted(ready)
+
+    def _shared_output(self, path: str, out_path: str) -> bool:
+        return any(p != path and entry.get("out_path") == out_path for p, entry in self.state.items())
+
+    def _claimed_outputs(self, path: str) -> set:
+        return {os.path.abspath(e["out_path"]) for p, e in self.state.items() if p != path and e.get("out_path")}
+
+    def process(self, path: str) -> Dict[str, Any]:
+        sig = self._pending.pop(path)
+        if self.defer_placement:
+            result = self.convert(path, out_dir=self.out_dir, defer_placement=True, **self.convert_kwargs)
+            place_outputs([result], self._claimed_outputs(path))
+        else:
+            result = self.convert(path, out_dir=self.out_dir, **self.convert_kwargs)
+        prev = self.state.get(path, {})
+        prev_out = prev.get("out_path")
+        if result["out_path"] and prev_out and prev_out != result["out_path"] and not self._shared_output(path, prev_out):
+            try:
+                os.remove(prev_out)
+            except OSError:
+                pass
+        self.state[path] = {
+            "size": sig[0],
+            "mtime_ns": sig[1],
+            "out_path": result["out_path"] or prev_out,
+            "n_obs": result["n_obs"],
+            "error": result["error"],
+        }
+        return result
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        results = []
+        for path in self.ready_files():
+            result = self.process(path)
+            results.append(result)
+            if self.on_result is not None:
+                self.on_result(result)
+        if results:
+            save_state(self.state_path, self.state)
+        return results
+
+    def run(self, interval: float = WATCH_INTERVAL, should_stop: Optional[Callable[[], bool]] = None):
+        while should_stop is None or not should_stop():
+            t0 = time.monotonic()
+            self.poll_once()
+            time.sleep(max(0.0, interval - (time.monotonic() - t0)))
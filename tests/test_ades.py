@@ -0,0 +1,64 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from ades_converter.ades import filter_band
+from ades_converter.alcdef import convert_alcdef_block, index_alcdef_blocks
+
+ARCHIVE = """STARTMETADATA
+OBJECTNUMBER=1234
+OBJECTNAME=Foo
+FILTER=Sr
+ENDMETADATA
+DATA=2460000.5|14.1|0.01
+STARTMETADATA
+OBJECTNUMBER=0
+OBJECTNAME=2025 FA22
+FILTER=V
+ENDMETADATA
+DATA=2460001.5|15.1|0.02
+STARTMETADATA
+OBJECTNAME=Foo
+FILTER=clear
+ENDMETADATA
+DATA=2460002.5|16.1|0.03
+"""
+EXPECTED = [("permID", "1234", "Sr"), ("provID", "2025 FA22", "V"), ("trkSub", "Foo", "C")]
+
+
+@pytest.mark.parametrize(
+    "filt, band",
+    [("Rc", "Rc"), ("Ic", "Ic"), ("Sr", "Sr"), (" Sg ", "Sg"), ("V", "V"), ("clear", "C"), ("CLEAR", "C"), ("None", "C"), ("", "")],
+)
+def test_filter_band_keeps_case(filt, band):
+    assert filter_band(filt) == band
+
+
+def convert_blocks(tmp_path, output_format):
+    path = tmp_path / "arc.txt"
+    path.write_text(ARCHIVE)
+    results = []
+    for block in index_alcdef_blocks(str(path)):
+        r = convert_alcdef_block(str(path), block, mpc="L90", out_dir=str(tmp_path), output_format=output_format)
+        assert r["error"] is None
+        results.append(r["tmp_path"])
+    return results
+
+
+def test_psv_identifier_and_band(tmp_path):
+    for out, (id_name, id_value, band) in zip(convert_blocks(tmp_path, "psv"), EXPECTED):
+        with open(out, encoding="utf-8") as f:
+            header, row = [ln for ln in f.read().splitlines() if not ln.startswith(("#", "!"))]
+        fields = dict(zip((c.strip() for c in header.split("|")), (c.strip() for c in row.split("|"))))
+        assert fields[id_name] == id_value
+        assert fields["band"] == band
+        os.remove(out)
+
+
+def test_xml_identifier_and_band(tmp_path):
+    for out, (id_name, id_value, band) in zip(convert_blocks(tmp_path, "xml"), EXPECTED):
+        optical = ET.parse(out).getroot().find("obsBlock/obsData/optical")
+        assert optical.findtext(id_name) == id_value
+        assert optical.findtext("band") == band
+        os.remove(out)
@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+import pytest
+
+from ades_converter.core import (
+    _parse_alcdef_block,
+    columns_from_records,
+    concat_columns,
+    format_mag_err,
+    iter_alcdef_column_chunks,
+    parse_alcdef_line,
+    scan_canopus_alcdef,
+)
+
+SEED = 20251016
+
+
+def number(rng: random.Random, lo: float, hi: float, max_dec: int = 6) -> str:
+    text = f"{rng.uniform(lo, hi):.{rng.randint(0, max_dec)}f}"
+    return rng.choice(["", "", "+"]) + text if not text.startswith("-") else text
+
+
+def data_line(rng: random.Random) -> str:
+    jd = f"{rng.uniform(2440000, 2470000):.{rng.randint(0, 8)}f}"
+    mag, err = number(rng, -2, 25), number(rng, 0, 1)
+    kind = rng.random()
+    if kind < 0.55:
+        fields = [jd, mag, err]
+    elif kind < 0.7:
+        fields = [jd, mag, err, number(rng, 1, 3), "x"]  # campi in più (airmass, note)
+    elif kind < 0.78:
+        fields = [jd, mag]  # riga corta
+    elif kind < 0.86:
+        fields = [jd, "", err] if rng.random() < 0.5 else [jd, mag, " "]  # campo vuoto
+    elif kind < 0.92:
+        fields = [f" {jd} ", f"  {mag}", f"{err}  "]
+    else:
+        fields = [jd, rng.choice(["1e-3", "nan", "14,1", "--1", "1.2.3"]), err]
+    return " " * rng.randint(0, 1) + "DATA=" + "|".join(fields)
+
+
+def make_file(rng: random.Random, n_lines: int, clean: bool = False) -> str:
+    lines = ["STARTMETADATA", "OBJECTNUMBER=1234", "FILTER=C", "ENDMETADATA"]
+    for _ in range(n_lines):
+        if clean:
+            lines.append(f"DATA={rng.uniform(2440000, 2470000):.6f}|{number(rng, 10, 20)}|{number(rng, 0, 1, 3)}")
+        elif rng.random() < 0.05:
+            lines.append(rng.choice(["", "COMMENT=test", "REVISEDDATA=FALSE", "ENDDATA"]))
+        else:
+            lines.append(data_line(rng))
+    return "\n".join(lines) + rng.choice(["\n", ""])
+
+
+def reference_columns(path):
+    return columns_from_records(scan_canopus_alcdef(str(path)))
+
+
+def assert_same_columns(got, ref):
+    np.testing.assert_array_equal(got.jd, ref.jd)
+    np.testing.assert_array_equal(got.mag, ref.mag)
+    np.testing.assert_array_equal(got.err, ref.err)
+    for n in (0, 1, 3):
+        assert format_mag_err(got, n, n) == format_mag_err(ref, n, n)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 50000])
+@pytest.mark.parametrize("clean", [True, False])
+def test_fast_path_matches_line_parser(tmp_path, newline, chunk_size, clean):
+    rng = random.Random(SEED + chunk_size + len(newline) + 100 * clean)
+    for i in range(5):
+        path = tmp_path / f"alcdef_{i}.txt"
+        with open(path, "w", encoding="utf-8", newline=newline) as f:
+            f.write(make_file(rng, rng.randint(1, 120), clean))
+        ref = reference_columns(path)
+        got = concat_columns(list(iter_alcdef_column_chunks(str(path), chunk_size=chunk_size)))
+        assert_same_columns(got, ref)
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+def test_clean_block_takes_fast_path(newline):
+    rng = random.Random(SEED)
+    data = make_file(rng, 200, clean=True).replace("\n", newline.decode()).encode()
+    cols = _parse_alcdef_block(np.frombuffer(data, dtype=np.uint8))
+    assert cols is not None
+    assert cols.mag_txt is None
+    ref = columns_from_records(filter(None, map(parse_alcdef_line, data.decode().splitlines())))
+    assert_same_columns(cols, ref)
@@ -0,0 +1,43 @@
+import os
+
+import ades_converter.alcdef as alcdef
+
+ARCHIVE = """STARTMETADATA
+OBJECTNUMBER=1234
+OBJECTNAME=Foo
+FILTER=Sr
+ENDMETADATA
+DATA=2460000.5|14.1|0.01
+DATA=2460000.6|14.2|0.01
+STARTMETADATA
+OBJECTNUMBER=0
+OBJECTNAME=2025 FA22
+FILTER=V
+ENDMETADATA
+DATA=2460001.5|15.1|0.02
+"""
+
+
+def write_archive(tmp_path):
+    path = tmp_path / "arc.txt"
+    path.write_text(ARCHIVE)
+    return str(path)
+
+
+def test_split_writes_one_file_per_block(tmp_path):
+    results = alcdef.convert_alcdef_archive(write_archive(tmp_path), mpc="L90")
+    assert [os.path.basename(r["out_path"]) for r in results] == [
+        "20230225UTC_L90_FOO_2_SR.txt",
+        "20230226UTC_L90_2025FA22_1_V.txt",
+    ]
+    assert sorted(os.listdir(tmp_path)) == ["20230225UTC_L90_FOO_2_SR.txt", "20230226UTC_L90_2025FA22_1_V.txt", "arc.txt"]
+
+
+def test_failed_write_leaves_no_temp_files(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError("disco pieno")
+
+    monkeypatch.setattr(alcdef, "write_output", fail)
+    results = alcdef.convert_alcdef_archive(write_archive(tmp_path), mpc="L90")
+    assert [r["error"] for r in results] == ["disco pieno", "disco pieno"]
+    assert os.listdir(tmp_path) == ["arc.txt"]
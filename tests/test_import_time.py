@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_PREFIXES = ("astropy", "PyQt5")
+
+
+def imported_modules(module: str) -> list:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    names = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:"):
+            names.append(line.split("|")[-1].strip())
+    return names
+
+
+@pytest.mark.parametrize("module", ["ades_converter.core", "ades_converter"])
+def test_import_does_not_load_heavy_modules(module):
+    names = imported_modules(module)
+    assert module in names
+    heavy = [n for n in names if n.split(".")[0] in HEAVY_PREFIXES]
+    assert heavy == []
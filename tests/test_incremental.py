@@ -0,0 +1,44 @@
+import os
+
+from ades_converter.incremental import convert_file_incremental
+
+TYCHO = "JD MAG ERR\n2460000.5 {mag} 0.01\n"
+
+
+def convert(path, out_dir):
+    result = convert_file_incremental(str(path), mpc="L90", obj="X", filt="C", out_dir=str(out_dir))
+    assert result["error"] is None
+    return result
+
+
+def test_append_keeps_mode_and_widens_columns(tmp_path):
+    src = tmp_path / "ty.txt"
+    src.write_text(TYCHO.format(mag=14.1))
+    first = convert(src, tmp_path)
+    os.chmod(first["out_path"], 0o644)
+    with open(src, "a") as f:
+        f.write("2460000.6 114.35 0.01\n")
+    second = convert(src, tmp_path)
+    assert second["mode"] == "append"
+    assert os.path.basename(second["out_path"]) == "20230225UTC_L90_X_2_C.txt"
+    assert not os.path.exists(first["out_path"])
+    assert os.stat(second["out_path"]).st_mode & 0o777 == 0o644
+    with open(second["out_path"]) as f:
+        assert f.read().splitlines()[1:] == ["2023-02-25T00:00:00.00Z  14.1 0.01", "2023-02-25T02:24:00.00Z 114.4 0.01"]
+
+
+def test_same_name_from_other_source_is_not_overwritten(tmp_path):
+    src1, src2 = tmp_path / "tel1.txt", tmp_path / "tel2.txt"
+    src1.write_text(TYCHO.format(mag=14.1))
+    src2.write_text(TYCHO.format(mag=15.1))
+    out1 = convert(src1, tmp_path)["out_path"]
+    out2 = convert(src2, tmp_path)["out_path"]
+    assert os.path.basename(out1) == "20230225UTC_L90_X_1_C.txt"
+    assert os.path.basename(out2) == "20230225UTC_L90_X_1_C_2.txt"
+    # una nuova esecuzione sulla stessa sorgente riusa il proprio file
+    src2.write_text(TYCHO.format(mag=15.2))
+    assert convert(src2, tmp_path)["out_path"] == out2
+    with open(out1) as f:
+        assert f.read().split()[-2] == "14.1"
+    with open(out2) as f:
+        assert f.read().split()[-2] == "15.2"
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+import pytest
+
+from ades_converter.core import FAST_ROUND_MAX_CHARS, to_n_decimals, to_n_decimals_array
+
+SEED = 20250920
+N_VALUES = 4000
+
+
+def random_decimal_text(rng: random.Random, max_frac: int = 8) -> str:
+    sign = rng.choice(["", "", "-"])
+    int_part = str(rng.choice([0, rng.randint(0, 9), rng.randint(10, 99), rng.randint(100, 999)]))
+    n_frac = rng.randint(0, max_frac)
+    if rng.random() < 0.5 and n_frac:
+        # cifra finale 5: caso di pareggio esatto per n = n_frac - 1
+        frac = "".join(rng.choice("0123456789") for _ in range(n_frac - 1)) + "5"
+    else:
+        frac = "".join(rng.choice("0123456789") for _ in range(n_frac))
+    return f"{sign}{int_part}.{frac}" if frac else f"{sign}{int_part}"
+
+
+def sample_texts(seed: int, long_texts: bool) -> list:
+    rng = random.Random(seed)
+    texts = ["-0", "-0.0", "0", "-0.004", "nan", "NaN", "0.5", "-0.5", "2.675", "1.005", "14.125", "-14.125"]
+    texts += [random_decimal_text(rng) for _ in range(N_VALUES)]
+    if long_texts:
+        # oltre FAST_ROUND_MAX_CHARS caratteri il testo va sempre al riferimento Decimal
+        texts += ["14.12500000000000001", "0.12499999999999999999", "-2.67500000000000000001"]
+        texts += [random_decimal_text(rng, max_frac=FAST_ROUND_MAX_CHARS + 4) for _ in range(N_VALUES // 4)]
+    return texts
+
+
+@pytest.mark.parametrize("n", range(7))
+def test_array_rounding_with_texts_matches_decimal(n):
+    texts = sample_texts(SEED + n, long_texts=True)
+    vals = np.asarray(texts, dtype=float)
+    assert to_n_decimals_array(vals, n, texts) == [to_n_decimals(s, n) for s in texts]
+
+
+@pytest.mark.parametrize("n", range(7))
+def test_array_rounding_without_texts_matches_decimal(n):
+    # percorso ALCDEF mappato in memoria: nessun testo, il fallback usa repr() del float
+    texts = sample_texts(SEED + 100 + n, long_texts=False)
+    vals = np.asarray(texts, dtype=float)
+    assert to_n_decimals_array(vals, n) == [to_n_decimals(s, n) for s in texts]
+
+
+@pytest.mark.parametrize("n", range(7))
+def test_forced_ties_round_half_up(n):
+    texts = []
+    for k in range(0, 2000, 7):
+        digits = f"{k:0{n + 1}d}"
+        int_part, frac = digits[: len(digits) - n], digits[len(digits) - n :]
+        for sign in ("", "-"):
+            texts.append(f"{sign}{int_part}.{frac}5")
+    vals = np.asarray(texts, dtype=float)
+    expected = [to_n_decimals(s, n) for s in texts]
+    assert to_n_decimals_array(vals, n, texts) == expected
+    assert to_n_decimals_array(vals, n) == expected
+
+
+def test_long_texts_use_decimal_reference():
+    # valori volutamente diversi dal testo: oltre il limite conta solo il testo
+    texts = ["1.23456789012345678", "-9.87654321098765432", "1.5"]
+    vals = np.zeros(len(texts))
+    assert to_n_decimals_array(vals, 2, texts) == ["1.23", "-9.88", "0.00"]
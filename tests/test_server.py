@@ -0,0 +1,81 @@
+import json
+import os
+import signal
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ades_converter.server import ConversionServer, worker_pid
+
+CSV = b"JD,Mag,MagErr\n2460000.5,14.123,0.012\n2460000.6,14.2,0.02\n"
+
+
+@pytest.fixture
+def server():
+    srv = ConversionServer(port=0, jobs=1, queue_size=2)
+    srv.warm_up()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+
+
+def request(srv, path, data=None):
+    req = urllib.request.Request(srv.url + path, data=data)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as r:
+            return r.status, dict(r.headers), r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+
+def test_convert_valid_input(server):
+    status, headers, body = request(server, "/convert?mpc=L90&object=X&filter=C", CSV)
+    assert status == 200
+    assert body.decode("utf-8").splitlines() == [
+        "#obsTime mag magUnc",
+        "2023-02-25T00:00:00.00Z 14.1 0.01",
+        "2023-02-25T02:24:00.00Z 14.2 0.02",
+    ]
+    assert headers["X-ADES-Observations"] == "2"
+    assert 'filename="20230225UTC_L90_X_2_C.txt"' in headers["Content-Disposition"]
+
+
+def test_bad_requests(server):
+    status, _, body = request(server, "/convert?date_dec=12", CSV)
+    assert status == 400
+    assert "date_dec" in json.loads(body)["error"]
+    status, _, _ = request(server, "/convert?format=fits", CSV)
+    assert status == 400
+    status, _, body = request(server, "/convert", b"nessun dato utile\n")
+    assert status == 422
+    assert json.loads(body)["error"]
+
+
+def test_stats_counters(server):
+    request(server, "/convert", CSV)
+    request(server, "/convert", b"nessun dato utile\n")
+    request(server, "/convert?mag_dec=x", CSV)
+    status, _, body = request(server, "/stats")
+    assert status == 200
+    stats = json.loads(body)
+    assert stats["requests"] == 2
+    assert stats["errors"] == 1
+    assert stats["rows"] == 2
+    assert stats["in_flight"] == 0
+    assert stats["rejected"] == stats["timeouts"] == 0
+
+
+def test_killed_worker_rebuilds_pool(server):
+    os.kill(server.pool.submit(worker_pid).result(), signal.SIGKILL)
+    # la prima richiesta dopo la morte del processo trova il pool rotto (subito o durante l'attesa)
+    statuses = [request(server, "/convert", CSV)[0] for _ in range(3)]
+    assert statuses[-1] == 200
+    assert set(statuses) <= {200, 503}
+    stats = json.loads(request(server, "/stats")[2])
+    assert stats["pool_restarts"] == statuses.count(503) == 1
+    assert stats["in_flight"] == 0
@@ -0,0 +1,39 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from ades_converter.core import jd_array_to_isot_z, jd_to_isot_z
+
+SEED = 20251016
+N_TASKS = 400
+
+
+def make_tasks():
+    rng = random.Random(SEED)
+    tasks = []
+    for i in range(N_TASKS):
+        jds = [rng.uniform(2441318.5, 2462000.5) for _ in range(rng.randint(1, 20))]
+        engine = ("fast", "astropy")[i % 2]
+        tasks.append((i % 3, rng.randint(0, 9), jds, engine))
+    return tasks
+
+
+def run_task(task):
+    kind, precision, jds, engine = task
+    if kind == 0:
+        return [jd_to_isot_z(jd, precision=precision) for jd in jds]
+    return jd_array_to_isot_z(jds, precision=precision, engine=engine)
+
+
+def test_threaded_precisions_match_serial():
+    tasks = make_tasks()
+    expected = [run_task(t) for t in tasks]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        got = list(pool.map(run_task, tasks))
+    assert got == expected
+    # riferimento indipendente: un errore comune a tutti i thread non passerebbe
+    for (_, precision, jds, _), isots in zip(tasks, got):
+        assert isots == jd_array_to_isot_z(jds, precision=precision, engine="astropy")
+    for (_, precision, _, _), isots in zip(tasks, got):
+        for s in isots:
+            frac = s[:-1].partition(".")[2]
+            assert len(frac) == precision
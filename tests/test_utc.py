@@ -0,0 +1,37 @@
+import pytest
+
+from ades_converter.core import jd_array_to_isot_z
+from ades_converter.utc import SECONDS_PER_DAY, cross_check_jd, leap_second_days
+
+# 2017-01-01 00:00 UTC, subito dopo il secondo intercalare del 2016-12-31
+JD_2017 = 2457754.5
+
+
+def test_cross_check_has_no_differences():
+    checked, mismatches = cross_check_jd(samples=200, seed=7)
+    assert checked > 0
+    assert mismatches == []
+
+
+def test_leap_second_days_include_2016():
+    assert int(JD_2017 - 0.5) in leap_second_days()
+
+
+@pytest.mark.parametrize(
+    "jd, precision, expected",
+    [
+        (JD_2017 - 1.0, 2, "2016-12-31T00:00:00.00Z"),
+        (JD_2017 - 1.5 / SECONDS_PER_DAY, 2, "2016-12-31T23:59:59.50Z"),
+        (JD_2017 - 0.5 / SECONDS_PER_DAY, 2, "2016-12-31T23:59:60.50Z"),
+        (JD_2017, 2, "2017-01-01T00:00:00.00Z"),
+        (JD_2017 + 1.0, 2, "2017-01-02T00:00:00.00Z"),
+        (2440000.5, 2, "1968-05-24T00:00:00.00Z"),
+        (2436934.75, 3, "1960-01-01T06:00:00.000Z"),
+        (2460000.5 - 0.004 / SECONDS_PER_DAY, 2, "2023-02-25T00:00:00.00Z"),
+        (2460000.5 - 0.4 / SECONDS_PER_DAY, 0, "2023-02-25T00:00:00Z"),
+        (2460000.5 - 0.006 / SECONDS_PER_DAY, 2, "2023-02-24T23:59:59.99Z"),
+    ],
+)
+def test_edge_cases_match_astropy(jd, precision, expected):
+    assert jd_array_to_isot_z([jd], precision) == [expected]
+    assert jd_array_to_isot_z([jd], precision, engine="astropy") == [expected]
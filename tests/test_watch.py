@@ -0,0 +1,23 @@
+import os
+
+from ades_converter.watch import FolderWatcher
+
+CSV = "JD,Mag,MagErr\n2460000.5,{mag},0.01\n"
+
+
+def poll(directory):
+    watcher = FolderWatcher(str(directory), mpc="L90", obj="X", filt="C")
+    watcher.ready_files()
+    return [r["out_path"] for r in watcher.poll_once()]
+
+
+def test_same_output_name_gets_suffix(tmp_path):
+    (tmp_path / "tel1.txt").write_text(CSV.format(mag=14.1))
+    (tmp_path / "tel2.txt").write_text(CSV.format(mag=15.1))
+    first = poll(tmp_path)
+    assert [os.path.basename(p) for p in first] == ["20230225UTC_L90_X_1_C.txt", "20230225UTC_L90_X_1_C_2.txt"]
+    # un passaggio successivo vede i nomi già assegnati nello stato
+    (tmp_path / "tel3.txt").write_text(CSV.format(mag=16.1))
+    assert [os.path.basename(p) for p in poll(tmp_path)] == ["20230225UTC_L90_X_1_C_3.txt"]
+    mags = [open(p).read().split()[-2] for p in first]
+    assert mags == ["14.1", "15.1"]